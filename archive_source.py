@@ -0,0 +1,111 @@
+import collections
+import datetime
+import os
+import posixpath
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+# Access to files inside ZIP and TAR archives (like phone backups) without extracting them to disk. Members are
+# addressed by "virtual" paths like "/backups/phone.zip/DCIM/IMG_01.JPG", so they go through analyze results and
+# classification the same way as usual files. 'zipfile' and 'tarfile' are imported on first use to keep startup fast.
+
+ARCHIVE_EXTENSIONS = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+ZIP_MIN_DATE = datetime.datetime(1980, 1, 1)
+
+ArchiveMember = collections.namedtuple('ArchiveMember', ['name', 'size', 'mtime', 'offset', 'info'])
+
+
+def is_archive(path: str) -> bool:
+    return path.lower().endswith(ARCHIVE_EXTENSIONS) and os.path.isfile(path)
+
+
+def find_archive(path: str) -> Optional[str]:
+    """
+    :param path: Path to file, may be "virtual" path of archive member.
+    :return: Path to archive if 'path' points into archive, otherwise None.
+    """
+    archive_path = path
+    while not os.path.exists(archive_path):
+        parent = os.path.dirname(archive_path)
+        if parent == archive_path:
+            return None
+        archive_path = parent
+    if archive_path == path or not is_archive(archive_path):
+        return None
+    return archive_path
+
+
+def _get_zip_mtime(info: 'zipfile.ZipInfo') -> datetime.datetime:
+    try:
+        return datetime.datetime(*info.date_time)
+    except ValueError:  # Some tools write zeroes.
+        return ZIP_MIN_DATE
+
+
+class ArchiveReader():
+    """
+    Lists and reads regular files of ZIP or TAR (optionally compressed) archive. Members are listed in order of their
+    data in archive, so reading them in this order goes through archive file sequentially.
+    """
+
+    def __init__(self, archive_path: str) -> None:
+        import tarfile
+        import zipfile
+        self.archive_path = archive_path
+        self.device = os.stat(archive_path).st_dev
+        self.zip: 'zipfile.ZipFile' = None
+        self.tar: 'tarfile.TarFile' = None
+        if zipfile.is_zipfile(archive_path):
+            # Timestamps and sizes come from central directory at the end of file, nothing else is read.
+            self.zip = zipfile.ZipFile(archive_path)
+            self.members = [
+                ArchiveMember(x.filename, x.file_size, _get_zip_mtime(x), x.header_offset, x)
+                for x in sorted(self.zip.infolist(), key=lambda x: x.header_offset) if not x.is_dir()
+            ]
+        else:
+            # TAR has headers before each member, uncompressed ones are skipped by seek.
+            self.tar = tarfile.open(archive_path, 'r:*')
+            self.members = [
+                ArchiveMember(x.name, x.size, datetime.datetime.fromtimestamp(x.mtime).replace(microsecond=0),
+                              x.offset, x)
+                for x in self.tar.getmembers() if x.isfile()
+            ]
+        self.members_by_path: Dict[str, ArchiveMember] = {self.get_path(x): x for x in self.members}
+        self.last_head: Tuple[str, bytes] = (None, None)
+
+    def __enter__(self) -> 'ArchiveReader':
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        (self.zip or self.tar).close()
+
+    def get_path(self, member: ArchiveMember) -> str:
+        return os.path.join(self.archive_path, *posixpath.normpath(member.name).lstrip('/').split('/'))
+
+    def walk(self) -> Iterator[Tuple[str, List[str]]]:
+        """
+        Like 'os.walk' yields folders with names of files in them.
+        """
+        folders: Dict[str, List[str]] = collections.OrderedDict()
+        for path in self.members_by_path:
+            folders.setdefault(os.path.dirname(path), []).append(os.path.basename(path))
+        yield from folders.items()
+
+    def open(self, path: str) -> BinaryIO:
+        """
+        :param path: Virtual path of member.
+        :return: Seekable file object to read member data. Seek back is slow in compressed archives.
+        """
+        info = self.members_by_path[path].info
+        return self.zip.open(info) if self.zip else self.tar.extractfile(info)
+
+    def read_head(self, path: str, size: int) -> bytes:
+        """
+        Reads beginning of member. The last read head is kept because few parsers usually parse the same file.
+        """
+        if self.last_head[0] != path:
+            with self.open(path) as file:
+                self.last_head = (path, file.read(size))
+        return self.last_head[1]
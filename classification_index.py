@@ -0,0 +1,117 @@
+import array
+import bisect
+import collections
+import datetime
+from typing import Dict, List, Optional, Tuple
+import locations
+
+
+class ClassificationIndex():
+    """
+    Precomputed data to split files sorted by time into buckets with any "max gap between files" and "min files in
+    bucket" parameters without going through all files again:
+    - gaps between consecutive files sorted to find files starting new bucket by binary search,
+    - sorted positions of files per label (brightness, orientation, camera) to count labels in bucket by 2 binary
+    searches,
+    - distances between consecutive geotagged files sorted like gaps and prefix sums of coordinates to get bucket
+    center by 2 lookups.
+    Numbers are kept in arrays, not in lists of Python objects, to fit millions of files in memory.
+    """
+
+    def __init__(self, timestamps: List[datetime.datetime], labels: Dict[str, List[str]],
+                 coordinates: List[Optional[Tuple[float, float]]] = None) -> None:
+        """
+        :param timestamps: Sorted timestamps of files.
+        :param labels: Dimension name -> label per file (in the same order as timestamps).
+        :param coordinates: (latitude, longitude) per file or None for files without location.
+        """
+        self.files_count = len(timestamps)
+        gaps = array.array('d', ((timestamps[i] - timestamps[i - 1]).total_seconds()
+                                 for i in range(1, self.files_count)))
+        # Indexes of files ordered by gap with previous file.
+        self.gap_order = array.array('L', sorted(range(1, self.files_count), key=lambda i: gaps[i - 1]))
+        self.sorted_gaps = array.array('d', (gaps[i - 1] for i in self.gap_order))
+        self.label_positions: Dict[str, Dict[str, array.array]] = {}
+        for dimension, dimension_labels in labels.items():
+            label_positions = self.label_positions[dimension] = {}
+            for i, label in enumerate(dimension_labels):
+                positions = label_positions.get(label)
+                if positions is None:
+                    positions = label_positions[label] = array.array('L')
+                positions.append(i)
+
+        # Distance from each geotagged file to previous geotagged file.
+        distances = {}
+        self.prefix_located_counts = array.array('L', [0])
+        self.prefix_latitudes = array.array('d', [0.0])
+        self.prefix_longitudes = array.array('d', [0.0])
+        count, latitude_sum, longitude_sum = 0, 0.0, 0.0
+        previous = None
+        for i, point in enumerate(coordinates or [None] * self.files_count):
+            if point:
+                if previous:
+                    distances[i] = locations.distance_km(previous[0], previous[1], point[0], point[1])
+                previous = point
+                count, latitude_sum, longitude_sum = count + 1, latitude_sum + point[0], longitude_sum + point[1]
+            self.prefix_located_counts.append(count)
+            self.prefix_latitudes.append(latitude_sum)
+            self.prefix_longitudes.append(longitude_sum)
+        self.distance_order = array.array('L', sorted(distances.keys(), key=lambda i: distances[i]))
+        self.sorted_distances = array.array('d', (distances[i] for i in self.distance_order))
+
+    def get_buckets(self, max_gap: datetime.timedelta, max_distance_km: float = None) -> List[Tuple[int, int]]:
+        """
+        Splits files into buckets where gap between consecutive files is not greater than 'max_gap' and distance
+        between consecutive geotagged files is not greater than 'max_distance_km'.
+        :param max_gap: Maximum gap between files in one bucket.
+        :param max_distance_km: Maximum distance between geotagged files in one bucket, None to don't split by place.
+        :return: List of (start, end) indexes of files in buckets, end is exclusive.
+        """
+        if not self.files_count:
+            return []
+        first_big_gap = bisect.bisect_right(self.sorted_gaps, max_gap.total_seconds())
+        starts = set(self.gap_order[first_big_gap:])
+        if max_distance_km is not None:
+            first_big_distance = bisect.bisect_right(self.sorted_distances, max_distance_km)
+            starts.update(self.distance_order[first_big_distance:])
+        starts = [0] + sorted(starts)
+        return list(zip(starts, starts[1:] + [self.files_count]))
+
+    def get_center(self, start: int, end: int) -> Optional[Tuple[float, float]]:
+        """
+        :return: Average (latitude, longitude) of geotagged files in bucket or None if there are no such files.
+        """
+        count = self.prefix_located_counts[end] - self.prefix_located_counts[start]
+        if not count:
+            return None
+        return ((self.prefix_latitudes[end] - self.prefix_latitudes[start]) / count,
+                (self.prefix_longitudes[end] - self.prefix_longitudes[start]) / count)
+
+    def count_labels(self, dimension: str, start: int, end: int) -> collections.Counter:
+        """
+        Counts labels of files in bucket.
+        :param dimension: Name of labels dimension.
+        :param start: Index of first file in bucket.
+        :param end: Index of file after the last file in bucket.
+        :return: Counter of labels.
+        """
+        counter = collections.Counter()
+        for label, positions in self.label_positions[dimension].items():
+            count = bisect.bisect_left(positions, end) - bisect.bisect_left(positions, start)
+            if count:
+                counter[label] = count
+        return counter
+
+    def summarize(self, max_gap: datetime.timedelta, min_files_count: int,
+                  max_distance_km: float = None) -> Tuple[int, int]:
+        """
+        :return: Tuple with number of folders and number of 'nothing common' files for given parameters.
+        """
+        folders_count = 0
+        out_of_bucket_files_count = 0
+        for start, end in self.get_buckets(max_gap, max_distance_km):
+            if end - start < min_files_count:
+                out_of_bucket_files_count += end - start
+            else:
+                folders_count += 1
+        return folders_count, out_of_bucket_files_count
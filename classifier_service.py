@@ -0,0 +1,257 @@
+from classify_camera_files import ProgressListener
+import copy
+import http.server
+import json
+import queue
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+from localization import t, add_translation, register_translations
+import transfer_scheduler
+
+# Local HTTP/JSON service which keeps one warm classifier (with translations and metadata cache loaded) and runs
+# queued jobs on it one by one. API:
+# - POST /jobs with {"action": "analyze|classify|copy|move", "settings": {...}} -> 202 and job.
+# - GET /jobs -> list of jobs.
+# - GET /jobs/<id> -> job with progress and "classified_files" plan when job is finished.
+# - DELETE /jobs/<id> -> cancel queued or running job.
+# Finished jobs are dropped after an hour or when there are too many of them.
+# Web pages opened in browser can send requests to local ports too, so only 'localhost' and '127.0.0.1' hosts are
+# served (against DNS rebinding) and jobs are posted as 'application/json' only, which browsers don't send to other
+# origins without CORS preflight - it is never answered here. Jobs can't replace target folder.
+
+
+@register_translations
+def _add_translations():
+    add_translation("Serving classifier on http://%{host}:%{port}/ ...",
+                    "Классификатор доступен на http://%{host}:%{port}/ ...", locale='ru')
+    add_translation("Job %{job_id} '%{action}' is %{status}.",
+                    "Задача %{job_id} '%{action}' в статусе %{status}.", locale='ru')
+    add_translation("Job is cancelled.", "Задача отменена.", locale='ru')
+
+
+class JobCancelledError(Exception):
+    pass
+
+
+class Job():
+    ACTIONS = {
+        'analyze': "analyze_all",
+        'classify': "classify_in_console",
+        'copy': "copy",
+        'move': "move",
+    }
+
+    def __init__(self, action: str, settings: Dict) -> None:
+        self.id = uuid.uuid4().hex
+        self.action = action
+        self.settings = settings
+        self.status = 'queued'
+        self.progress_done = 0
+        self.progress_total = 0
+        self.error: Optional[str] = None
+        self.classified_files = None
+        self.cancel_event = threading.Event()
+        self.finished_time: Optional[float] = None
+
+    def finish(self, status: str):
+        self.status = status
+        self.finished_time = time.monotonic()
+
+    def to_json(self) -> Dict:
+        return {
+            "id": self.id,
+            "action": self.action,
+            "settings": self.settings,
+            "status": self.status,
+            "progress": {"done": self.progress_done, "total": self.progress_total},
+            "error": self.error,
+            # Folder may be None for 'nothing common' files, JSON doesn't allow such keys so use list.
+            "classified_files": [
+                {"folder": folder, "files": files} for folder, files in self.classified_files.items()
+            ] if self.classified_files is not None else None,
+        }
+
+
+class JobProgressListener(ProgressListener):
+    def __init__(self, job: Job) -> None:
+        super().__init__()
+        self.job = job
+
+    def start(self, total: float):
+        self.job.progress_done = 0
+        self.job.progress_total = total
+
+    def step(self, value: float):
+        # Progress is reported between files, it is the safe place to stop job.
+        if self.job.cancel_event.is_set():
+            raise JobCancelledError(t("Job is cancelled."))
+        self.job.progress_done += value
+
+
+class ClassifierRequestHandler(http.server.BaseHTTPRequestHandler):
+    ALLOWED_HOSTS = ('127.0.0.1', 'localhost')
+
+    def _send_json(self, code: int, body):
+        data = json.dumps(body, default=str).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _check_host(self) -> bool:
+        port = self.server.server_address[1]
+        if self.headers.get('Host') in [f"{x}:{port}" for x in self.ALLOWED_HOSTS]:
+            return True
+        self._send_json(403, {"error": "Forbidden host"})
+        return False
+
+    def _get_job(self) -> Optional[Job]:
+        parts = self.path.strip('/').split('/')
+        if len(parts) != 2 or parts[0] != 'jobs':
+            return None
+        return self.server.service.get_job(parts[1])
+
+    def do_GET(self):
+        if not self._check_host():
+            return
+        if self.path.rstrip('/') == '/jobs':
+            self._send_json(200, [x.to_json() for x in self.server.service.get_jobs()])
+            return
+        job = self._get_job()
+        if job:
+            self._send_json(200, job.to_json())
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        if not self._check_host():
+            return
+        if self.path.rstrip('/') != '/jobs':
+            self._send_json(404, {"error": "Not found"})
+            return
+        if self.headers.get_content_type() != 'application/json':
+            self._send_json(415, {"error": "Content-Type should be 'application/json'."})
+            return
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            if not isinstance(body, dict):
+                raise ValueError("Body should be JSON object.")
+            job = self.server.service.submit(body.get('action'), body.get('settings', {}))
+        except ValueError as e:  # Includes JSON decode errors.
+            self._send_json(400, {"error": str(e)})
+            return
+        self._send_json(202, job.to_json())
+
+    def do_DELETE(self):
+        if not self._check_host():
+            return
+        job = self._get_job()
+        if job:
+            self.server.service.cancel(job)
+            self._send_json(200, job.to_json())
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def log_message(self, format, *args):
+        self.server.service.classifier.logger.debug(format, *args)
+
+
+class ClassifierService():
+    # Finished jobs keep whole plans of classification, so they are kept for a while only.
+    MAX_FINISHED_JOBS = 100
+    FINISHED_JOB_TTL_SECONDS = 60 * 60
+
+    def __init__(self, classifier) -> None:
+        self.classifier = classifier
+        self.jobs: Dict[str, Job] = {}
+        self.jobs_lock = threading.Lock()
+        self.queue: queue.Queue = queue.Queue()
+
+    def get_jobs(self) -> List[Job]:
+        with self.jobs_lock:
+            return list(self.jobs.values())
+
+    def get_job(self, job_id: str) -> Optional[Job]:
+        with self.jobs_lock:
+            return self.jobs.get(job_id)
+
+    def _drop_finished_jobs(self):
+        with self.jobs_lock:
+            finished = [x for x in self.jobs.values() if x.finished_time is not None]
+            expire_time = time.monotonic() - self.FINISHED_JOB_TTL_SECONDS
+            for i, job in enumerate(sorted(finished, key=lambda x: x.finished_time, reverse=True)):
+                if i >= self.MAX_FINISHED_JOBS or job.finished_time < expire_time:
+                    del self.jobs[job.id]
+
+    def submit(self, action: str, settings: Dict) -> Job:
+        if not isinstance(settings, dict):
+            raise ValueError("Settings should be JSON object.")
+        if not isinstance(action, str) or action not in Job.ACTIONS:
+            raise ValueError(f"Unknown action '{action}', expected one of {list(Job.ACTIONS.keys())}.")
+        unknown_settings = set(settings.keys()) - set(self.classifier.settings.keys())
+        if unknown_settings:
+            raise ValueError(f"Unknown settings {sorted(unknown_settings)}.")
+        if settings.get('is_replace_target'):
+            raise ValueError("Target folder can't be replaced via API.")
+        # Replace deletes whole target folder, too dangerous for anything which can reach local port, even if
+        # service is started with it.
+        settings = dict(settings, is_replace_target=False)
+        if isinstance(settings.get('io_limits'), str):
+            # Parse before job starts to don't clean target folder and fail later.
+            settings = dict(settings, io_limits=transfer_scheduler.parse_limits(settings['io_limits']))
+        job = Job(action, settings)
+        self._drop_finished_jobs()
+        with self.jobs_lock:
+            self.jobs[job.id] = job
+        self.queue.put(job)
+        return job
+
+    def cancel(self, job: Job):
+        job.cancel_event.set()
+        if job.status == 'queued':
+            job.finish('cancelled')
+
+    def _run_job(self, job: Job):
+        classifier = self.classifier
+        settings_to_restore = copy.deepcopy(classifier.settings)
+        progress_listener = JobProgressListener(job)
+        classifier.settings.update(job.settings)
+        classifier.progress_listeners.append(progress_listener)
+        classifier.classified_files = None
+        job.status = 'running'
+        try:
+            getattr(classifier, Job.ACTIONS[job.action])()
+            job.classified_files = classifier.classified_files
+            job.finish('done')
+        except JobCancelledError:
+            job.finish('cancelled')
+        except Exception as e:
+            classifier.logger.error(e, exc_info=True)
+            job.error = str(e)
+            job.finish('failed')
+        finally:
+            classifier.progress_listeners.remove(progress_listener)
+            classifier.settings.update(settings_to_restore)
+        classifier.logger.info(t("Job %{job_id} '%{action}' is %{status}.",
+                                 job_id=job.id, action=job.action, status=job.status))
+        self._drop_finished_jobs()
+
+    def _work(self):
+        # Classifier isn't thread-safe so jobs run one by one.
+        while True:
+            job = self.queue.get()
+            if not job.cancel_event.is_set():
+                self._run_job(job)
+
+    def serve_forever(self, host: str, port: int):
+        threading.Thread(target=self._work, daemon=True).start()
+        server = http.server.ThreadingHTTPServer((host, port), ClassifierRequestHandler)
+        server.service = self
+        self.classifier.logger.info(t("Serving classifier on http://%{host}:%{port}/ ...", host=host, port=port))
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
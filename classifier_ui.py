@@ -7,9 +7,13 @@ from tkinter import messagebox
 from tkinter import filedialog
 from types import FunctionType
 from functools import partial
-from localization import t, add_translation
+from localization import t, add_translation, register_translations
+from typing import List, Tuple
+import bisect
+import os
 import threading
 import copy
+import thumbnails
 
 # UI to show classifier activity and ask details based on Tkinter and
 # https://stackoverflow.com/questions/13318742/python-logging-to-tkinter-text-widget
@@ -59,23 +63,145 @@ class ProgressBarProgressListener(ProgressListener):
     def step(self, value: float):
         self.progress_bar.step(value)
 
+
+class ThumbnailGrid(tk.Frame):
+    """
+    Grid of thumbnails split by buckets with headers. Virtualized - only visible rows are put on canvas, so it scrolls
+    smoothly through any number of files.
+    """
+    CELL_SIZE = thumbnails.THUMBNAIL_SIZE + 8
+    HEADER_HEIGHT = 24
+    SCROLL_UNIT = 40
+
+    def __init__(self, master, thumbnail_cache: thumbnails.ThumbnailCache, **kw):
+        tk.Frame.__init__(self, master, **kw)
+        self.thumbnail_cache = thumbnail_cache
+        self.canvas = tk.Canvas(self, background='white', highlightthickness=0)
+        self.scrollbar = tk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.canvas.grid(row=0, column=0, sticky=tk.NSEW)
+        self.scrollbar.grid(row=0, column=1, sticky=tk.NS)
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(0, weight=1)
+        self.buckets: List[Tuple[str, List[str]]] = []
+        # Rows as (top y, bucket name for header row or None, file paths for thumbnails row), sorted by y.
+        self.rows: List[tuple] = []
+        self.rows_y: List[int] = []
+        self.total_height = 0
+        self.offset = 0
+        # Tk images of visible thumbnails only, Tk shows image only while Python keeps reference to it.
+        self.photos = {}
+        self.is_redraw_scheduled = False
+        self.canvas.bind('<Configure>', lambda event: self._layout())
+        self.canvas.bind('<MouseWheel>', lambda event: self._scroll_to(self.offset - event.delta))
+        self.canvas.bind('<Button-4>', lambda event: self._scroll_to(self.offset - self.SCROLL_UNIT))
+        self.canvas.bind('<Button-5>', lambda event: self._scroll_to(self.offset + self.SCROLL_UNIT))
+
+    def set_buckets(self, buckets: List[Tuple[str, List[str]]]):
+        """
+        :param buckets: List of (bucket name, paths to files in bucket).
+        """
+        self.buckets = buckets
+        self.offset = 0
+        self._layout()
+
+    def _layout(self):
+        columns_count = max(1, self.canvas.winfo_width() // self.CELL_SIZE)
+        self.rows = []
+        y = 0
+        for bucket_name, file_paths in self.buckets:
+            self.rows.append((y, bucket_name, None))
+            y += self.HEADER_HEIGHT
+            for i in range(0, len(file_paths), columns_count):
+                self.rows.append((y, None, file_paths[i:i + columns_count]))
+                y += self.CELL_SIZE
+        self.rows_y = [x[0] for x in self.rows]
+        self.total_height = y
+        self._scroll_to(self.offset)
+
+    def _on_scrollbar(self, command: str, value: str, units: str = None):
+        if command == 'moveto':
+            self._scroll_to(float(value) * self.total_height)
+        elif units == 'pages':
+            self._scroll_to(self.offset + int(value) * self.canvas.winfo_height())
+        else:
+            self._scroll_to(self.offset + int(value) * self.SCROLL_UNIT)
+
+    def _scroll_to(self, offset: float):
+        self.offset = int(max(0, min(offset, self.total_height - self.canvas.winfo_height())))
+        self._redraw()
+
+    def _on_thumbnail_loaded(self, file_path: str):
+        # Called from background threads, join redraws of many loaded thumbnails into one.
+        if file_path in self.photos and not self.is_redraw_scheduled:
+            self.is_redraw_scheduled = True
+            self.after(50, self._redraw)
+
+    def _redraw(self):
+        from PIL import ImageTk
+        self.is_redraw_scheduled = False
+        self.canvas.delete('all')
+        height = self.canvas.winfo_height()
+        photos = {}
+        for y, bucket_name, file_paths in self.rows[max(0, bisect.bisect_right(self.rows_y, self.offset) - 1):]:
+            if y >= self.offset + height:
+                break
+            y -= self.offset
+            if file_paths is None:
+                self.canvas.create_text(4, y + self.HEADER_HEIGHT // 2, text=bucket_name, anchor=tk.W,
+                                        font=('Sans', '10', 'bold'))
+                continue
+            for column, file_path in enumerate(file_paths):
+                x = column * self.CELL_SIZE
+                is_loaded, image = self.thumbnail_cache.get(file_path)
+                photo = self.photos.get(file_path)
+                if photo is None and image is not None:
+                    photo = ImageTk.PhotoImage(image)
+                photos[file_path] = photo
+                if photo is not None:
+                    self.canvas.create_image(x + self.CELL_SIZE // 2, y + self.CELL_SIZE // 2, image=photo)
+                else:
+                    # Placeholder with file name for files which are loading or don't have thumbnail (videos).
+                    self.canvas.create_rectangle(x + 4, y + 4, x + self.CELL_SIZE - 4, y + self.CELL_SIZE - 4,
+                                                 outline='grey' if is_loaded else 'lightgrey')
+                    self.canvas.create_text(x + self.CELL_SIZE // 2, y + self.CELL_SIZE // 2,
+                                            text=os.path.basename(file_path), width=self.CELL_SIZE - 12)
+        self.photos = photos
+        self.thumbnail_cache.request(
+            [x for x, photo in photos.items() if photo is None],
+            lambda file_path: self.after(0, self._on_thumbnail_loaded, file_path))
+        if self.total_height:
+            self.scrollbar.set(self.offset / self.total_height, min(1.0, (self.offset + height) / self.total_height))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+
+@register_translations
+def _add_translations():
+    add_translation('Camera files classifier by Alexander Makarov',
+                    'Классификатор фото/видео от Александра Макарова', locale='ru')
+    add_translation('Browse', 'Выбрать', locale='ru')
+    add_translation('Source folder:', 'Из папки:', locale='ru')
+    add_translation('Target folder:', 'В папку:', locale='ru')
+    add_translation('Specify folder with camera files',
+                    'Укажите папку с файлами фотоаппарата', locale='ru')
+    add_translation("Specify folder copy/move files into", "Укажите папку куда переместить/копировать файлы",
+                    locale='ru')
+    add_translation('Is replace target', 'Перезаписать', locale='ru')
+    add_translation('Analyze and Copy', 'Анализ и копировать', locale='ru')
+    add_translation('Analyze and Move', 'Анализ и переместить', locale='ru')
+    add_translation('Analyze Only', 'Анализ только', locale='ru')
+    add_translation('Classifier error: %{error}', 'Ошибка классификатора: %{error}', locale='ru')
+    add_translation('Classifier task completed.', 'Таск классификатора закончен.', locale='ru')
+    add_translation('Max minutes between files:', 'Макс. минут между файлами:', locale='ru')
+    add_translation('Min files in folder:', 'Мин. файлов в папке:', locale='ru')
+    add_translation('Preview', 'Предпросмотр', locale='ru')
+    add_translation('Press "Preview" to load analyze results.',
+                    'Нажмите "Предпросмотр" чтобы загрузить результаты анализа.', locale='ru')
+    add_translation("Nothing common", "Ничего общего", locale='ru')
+
+
 class ClassifierUI():
     def __init__(self):
-        add_translation('Camera files classifier by Alexander Makarov',
-                        'Классификатор фото/видео от Александра Макарова', locale='ru')
-        add_translation('Browse', 'Выбрать', locale='ru')
-        add_translation('Source folder:', 'Из папки:', locale='ru')
-        add_translation('Target folder:', 'В папку:', locale='ru')
-        add_translation('Specify folder with camera files',
-                        'Укажите папку с файлами фотоаппарата', locale='ru')
-        add_translation("Specify folder copy/move files into", "Укажите папку куда переместить/копировать файлы",
-                        locale='ru')
-        add_translation('Is replace target', 'Перезаписать', locale='ru')
-        add_translation('Analyze and Copy', 'Анализ и копировать', locale='ru')
-        add_translation('Analyze and Move', 'Анализ и переместить', locale='ru')
-        add_translation('Analyze Only', 'Анализ только', locale='ru')
-        add_translation('Classifier error: %{error}', 'Ошибка классификатора: %{error}', locale='ru')
-        add_translation('Classifier task completed.', 'Таск классификатора закончен.', locale='ru')
         self.root = tk.Tk()
         self.root.title(t('Camera files classifier by Alexander Makarov'))
         # Control frame at top.
@@ -121,7 +247,37 @@ class ClassifierUI():
             variable=self.is_replace,
             onvalue=1, offvalue=0
         )
-        # 4 row with action buttons.
+        # 4-6 rows with classification parameters and preview of their result.
+        self.max_minutes_label = tk.Label(
+            self.control_frame,
+            text=t('Max minutes between files:')
+        )
+        self.max_minutes = tk.IntVar()
+        self.max_minutes_scale = tk.Scale(
+            self.control_frame,
+            variable=self.max_minutes,
+            from_=1, to=720, orient=tk.HORIZONTAL,
+        )
+        self.min_files_count_label = tk.Label(
+            self.control_frame,
+            text=t('Min files in folder:')
+        )
+        self.min_files_count = tk.IntVar()
+        self.min_files_count_scale = tk.Scale(
+            self.control_frame,
+            variable=self.min_files_count,
+            from_=1, to=50, orient=tk.HORIZONTAL,
+        )
+        self.preview_button = tk.Button(
+            self.control_frame,
+            text=t('Preview'),
+        )
+        self.preview = tk.StringVar()
+        self.preview_label = tk.Label(
+            self.control_frame,
+            textvariable=self.preview,
+        )
+        # 7 row with action buttons.
         self.analyze_and_copy_button = tk.Button(
             self.control_frame,
             text=t('Analyze and Copy'),
@@ -164,6 +320,27 @@ class ClassifierUI():
             row=row, column=1, sticky=tk.W
         )
         row = 3
+        self.max_minutes_label.grid(
+            row=row, column=0, sticky=tk.E
+        )
+        self.max_minutes_scale.grid(
+            row=row, column=1, sticky=tk.EW
+        )
+        row = 4
+        self.min_files_count_label.grid(
+            row=row, column=0, sticky=tk.E
+        )
+        self.min_files_count_scale.grid(
+            row=row, column=1, sticky=tk.EW
+        )
+        row = 5
+        self.preview_button.grid(
+            row=row, column=0, sticky=tk.EW
+        )
+        self.preview_label.grid(
+            row=row, column=1, sticky=tk.W
+        )
+        row = 6
         self.analyze_and_copy_button.grid(
             row=row, column=0, sticky=tk.EW
         )
@@ -189,21 +366,102 @@ class ClassifierUI():
         self.progress_bar.grid(
             row=row, column=0, sticky=tk.EW
         )
-        # Add text widget to display logging info under control frame. Put on grid.
+        # Add text widget to display logging info and grid of thumbnails under control frame. Put on grid.
         row = 2
-        self.log_view = LogScrolledText(self.root)
-        self.log_view.grid(
+        self.panes = tk.PanedWindow(self.root, orient=tk.VERTICAL)
+        self.log_view = LogScrolledText(self.panes, height=10)
+        self.thumbnail_grid = ThumbnailGrid(self.panes, thumbnails.ThumbnailCache(), height=300)
+        self.panes.add(self.log_view.frame)  # ScrolledText is placed in own frame with scrollbar.
+        self.panes.add(self.thumbnail_grid, stretch='always')
+        self.panes.grid(
             row=row, column=0, sticky=tk.NSEW
         )
+        self.thumbnails_update_job = None
+        self.is_command_running = False
+        self.root.protocol('WM_DELETE_WINDOW', self._on_close)
         # Full the whole window with both top widgets on horizontal, expand log view on vertical.
         self.root.columnconfigure(0, weight=1)
         self.root.rowconfigure(2, weight=1)
 
+    def _on_close(self):
+        self.thumbnail_grid.thumbnail_cache.close()
+        self.root.destroy()
+
+    def _set_command_running(self, is_running: bool):
+        # Classifier isn't thread-safe: while command runs in background don't re-classify it from UI thread and don't
+        # let to change its settings or start other commands.
+        self.is_command_running = is_running
+        state = tk.DISABLED if is_running else tk.NORMAL
+        for widget in (self.max_minutes_scale, self.min_files_count_scale, self.preview_button,
+                       self.analyze_and_copy_button, self.analyze_and_move_button, self.analyze_button):
+            widget.configure(state=state)
+        if is_running and self.thumbnails_update_job:
+            self.root.after_cancel(self.thumbnails_update_job)
+            self.thumbnails_update_job = None
+
+    def _on_command_finished(self, classifier):
+        self._set_command_running(False)
+        self._update_preview(classifier)
+        self._update_thumbnails(classifier)
+
     def ask_folder(self, dialog_title: str, variable: tk.StringVar):
         folder = filedialog.askdirectory(title=dialog_title)
         if folder:
             variable.set(folder)
 
+    def _update_preview(self, classifier, *args):
+        # Index allows to re-classify instantly so preview follows scales while they are dragged.
+        index = classifier.classification_index
+        if index is None:
+            self.preview.set(t('Press "Preview" to load analyze results.'))
+            return
+        folders_len, files_number = index.summarize(
+            classifier._get_in_folder_gap(self.max_minutes.get()), self.min_files_count.get(),
+            classifier.settings['max_km_between_files_in_folder'])
+        self.preview.set(t("Total %{folders_len} folders and %{files_number} 'nothing common' files.",
+                           folders_len=folders_len, files_number=files_number))
+
+    def _on_scale_changed(self, classifier, *args):
+        self._update_preview(classifier)
+        self._schedule_thumbnails_update(classifier)
+
+    def _schedule_thumbnails_update(self, classifier):
+        # Classify only when scale stops to move.
+        if self.thumbnails_update_job:
+            self.root.after_cancel(self.thumbnails_update_job)
+        self.thumbnails_update_job = self.root.after(300, self._update_thumbnails, classifier)
+
+    def _update_thumbnails(self, classifier):
+        self.thumbnails_update_job = None
+        if self.is_command_running or classifier.classification_index is None:
+            return
+        settings_to_restore = copy.deepcopy(classifier.settings)
+        classifier.settings['max_minutes_between_files_in_folder'] = self.max_minutes.get()
+        classifier.settings['min_folder_files_count'] = self.min_files_count.get()
+        classifier.settings['verbose'] = False
+        try:
+            classifier._classify()
+        finally:
+            classifier.settings.update(settings_to_restore)
+        # Show only main files, not their companions (RAW, sidecars) which go along with them.
+        main_paths = {x['Path'] for x in classifier.timestamped_results}
+        self.thumbnail_grid.set_buckets([
+            (folder_name or t("Nothing common"), [x[0] for x in files_actions if x[0] in main_paths])
+            for folder_name, files_actions in classifier.classified_files.items()
+        ])
+
+    def _load_preview(self, classifier):
+        def task():
+            try:
+                classifier._read_results()
+                classifier._build_classification_index()
+            except Exception as e:
+                classifier.logger.error(t('Classifier error: %{error}', error=e), exc_info=True)
+            self.root.after(0, self._on_command_finished, classifier)
+
+        self._set_command_running(True)
+        threading.Thread(target=task).start()
+
     @staticmethod
     def _build_task_classifier_command_with_logs(command: FunctionType, final_task: FunctionType, logger: logging.Logger):
         def task():
@@ -222,16 +480,23 @@ class ClassifierUI():
         classifier.settings['source_folder'] = self.source_folder.get()
         classifier.settings['target_folder'] = self.target_folder.get()
         classifier.settings['is_replace_target'] = True if self.is_replace.get() == 1 else False
+        classifier.settings['max_minutes_between_files_in_folder'] = self.max_minutes.get()
+        classifier.settings['min_folder_files_count'] = self.min_files_count.get()
         classifier.progress_listeners.append(ProgressBarProgressListener(self.progress_bar))
         settings_to_restore = copy.deepcopy(classifier.settings)
         if force_verbose:
             classifier.settings['verbose'] = True
 
+        def final_task():
+            classifier.settings.update(settings_to_restore)
+            self.root.after(0, self._on_command_finished, classifier)
+
         # Run command in separate thread to don't freeze UI.
+        self._set_command_running(True)
         threading.Thread(
             target=self._build_task_classifier_command_with_logs(
                 command=command,
-                final_task=lambda: classifier.settings.update(settings_to_restore),
+                final_task=final_task,
                 logger=classifier.logger
             )
         ).start()
@@ -241,6 +506,12 @@ class ClassifierUI():
         self.source_folder.set(classifier.settings['source_folder'])
         self.target_folder.set(classifier.settings['target_folder'])
         self.is_replace.set(1 if classifier.settings['is_replace_target'] else 0)
+        self.max_minutes.set(classifier.settings['max_minutes_between_files_in_folder'])
+        self.min_files_count.set(classifier.settings['min_folder_files_count'])
+        self._update_preview(classifier)
+        self.max_minutes_scale.configure(command=partial(self._on_scale_changed, classifier))
+        self.min_files_count_scale.configure(command=partial(self._on_scale_changed, classifier))
+        self.preview_button.configure(command=partial(self._load_preview, classifier))
         # Bind classifier logs output to 'log_view'.
         classifier.logger.addHandler(WidgetLogger(self.log_view))
         # Assign buttons to classifier actions.
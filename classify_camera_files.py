@@ -2,25 +2,145 @@
 import argparse
 import os
 import datetime
-import csv
 import sys
 import logging
 from types import FunctionType
-from typing import Any, List, Dict, Set, Callable, AnyStr, Iterable
-from PIL import Image, ExifTags
+from typing import Any, List, Dict, Set, Callable, AnyStr, Iterable, BinaryIO, Union
 import collections
 import shutil
-from localization import t, setup_localization, add_translation
+import struct
+import mmap_metadata
+from classification_index import ClassificationIndex
+import similar_images
+import locations
+import transfer_scheduler
+import archive_source
+from functools import partial
+from localization import t, setup_localization, add_translation, register_translations
 import locale
-import tqdm
-from tqdm.contrib.logging import logging_redirect_tqdm
+# Heavy modules (PIL, tqdm, csv, hashlib, concurrent.futures) are imported on first use to keep CLI startup fast.
+
+
+@register_translations
+def _add_translations():
+    # Note that Russian case is played via "few".
+    add_translation("No resutls to analyze, make sure that they are loaded.",
+                    'Нет результатов анализа, проверьте что они загружены.', locale='ru')
+    add_translation('Landscape', {
+                    'one': 'Ландшафтная', 'few': 'Ландшафтная', 'many': 'Ландшафтной'}, locale='ru')
+    add_translation('Portrait', {
+                    'one': 'Портретная', 'few': 'Портретная', 'many': 'Портретной'}, locale='ru')
+    add_translation(
+        'Dark', {'one': 'Тёмный', 'few': 'Тёмных', 'many': 'Тёмные'}, locale='ru')
+    add_translation(
+        'Light', {'one': 'Светлый', 'few': 'Светлых', 'many': 'Светлые'}, locale='ru')
+    add_translation('Unknown orientation',
+                    'Неизвестная ориентация', locale='ru')
+    add_translation("Looking through '%{source_folder}'...",
+                    "Анализирую '%{source_folder}'...", locale='ru')
+    add_translation("Analyzed %{files_number} files from '%{source_folder}' in %{duration}.",
+                    "Анализировано %{files_number} файлов в '%{source_folder}' за %{duration}.", locale='ru')
+    add_translation(
+        "Found %{files_number} files docs with %{keys} fields in '%{file_path}'.",
+        "Найдено %{files_number} описаний файлов с %{keys} полями в '%{file_path}'.",
+        locale='ru'
+    )
+    add_translation(
+        "Found nothing in '%{file_path}'.", "Ничего не найдено в %{file_path}.", locale='ru')
+    add_translation(
+        "Dumped %{files_number} files analyze results with %{possible_keys} columns into '%{file_path}'.",
+        "Сохранено %{files_number} результатов анализа файлов с %{possible_keys} полями в '%{file_path}'",
+        locale='ru'
+    )
+    add_translation("all %{label}", "все %{label}", locale='ru')
+    add_translation("mixed %{label1} and %{label2}",
+                    "смешаны %{label1} и %{label2}", locale='ru')
+    add_translation("mostly %{label}", "больше %{label}", locale='ru')
+    add_translation("Wrong DateTimeOriginal value in %{file_path} file: %{e}",
+                    "Неверное значение DateTimeOriginal в %{file_path} файле: %{e}", locale='ru')
+    add_translation("Can't read EXIF from %{file_path} file: %{e}",
+                    "Не удалось прочитать EXIF из %{file_path} файла: %{e}", locale='ru')
+    add_translation("Can't read creation time from %{file_path} video: %{e}",
+                    "Не удалось прочитать время создания из %{file_path} видео: %{e}", locale='ru')
+    add_translation("Can't compute perceptual hash of %{file_path} file: %{e}",
+                    "Не удалось вычислить перцептивный хеш %{file_path} файла: %{e}", locale='ru')
+    add_translation(" files on ", " файлов в ", locale='ru')
+    add_translation(
+        "Skipping %{skipped_from_buckets_files} files as 'nothing common' in %{last_bucket_timestamp}"
+        "...%{start_bucket_timestamp}",
+        "Пропускаю %{skipped_from_buckets_files} файлов как 'ничего общего' в %{last_bucket_timestamp}"
+        "...%{start_bucket_timestamp}",
+        locale='ru'
+    )
+    add_translation("    Camera: %{camera_model_counter}",
+                    "    Камера: %{camera_model_counter}", locale='ru')
+    add_translation("    Brightness: %{brightness_counter}",
+                    "    Яркость: %{brightness_counter}", locale='ru')
+    add_translation("    Orientation: %{orientation_counter}",
+                    "    Ориентация: %{orientation_counter}", locale='ru')
+    add_translation("Total %{folders_len} folders and %{files_number} 'nothing common' files.",
+                    "Итого %{folders_len} папок и %{files_number} 'ничего общего' файлов.", locale='ru')
+    add_translation("Copying %{files_number} files into %{folder_name}...",
+                    "Копирую %{files_number} файлов в %{folder_name}...", locale='ru')
+    add_translation("Moving %{files_number} files into %{folder_name}...",
+                    "Переношу %{files_number} файлов в %{folder_name}...", locale='ru')
+    add_translation(
+        "Created %{folders_number} folders and copied %{files_number} files into '%{folder}' in %{duration}.",
+        "Создано %{folders_number} папок и скопировано %{files_number} файлов в '%{folder}' за %{duration}.",
+        locale='ru'
+    )
+    add_translation(
+        "Created %{folders_number} folders and moved %{files_number} files into '%{folder}' in %{duration}.",
+        "Создано %{folders_number} папок и перенесено %{files_number} файлов в '%{folder}' за %{duration}.",
+        locale='ru'
+    )
+    add_translation("Checksum mismatch in '%{file_path}' file.",
+                    "Не совпадает контрольная сумма '%{file_path}' файла.", locale='ru')
+    add_translation("File '%{file_path}' is absent.", "Файл '%{file_path}' отсутствует.", locale='ru')
+    add_translation("Saved manifest for %{files_number} files into '%{file_path}'.",
+                    "Сохранён манифест %{files_number} файлов в '%{file_path}'.", locale='ru')
+    add_translation("Verifying %{files_number} files from '%{file_path}'...",
+                    "Проверяю %{files_number} файлов из '%{file_path}'...", locale='ru')
+    add_translation("Verified %{files_number} files in %{duration}.",
+                    "Проверено %{files_number} файлов за %{duration}.", locale='ru')
+    add_translation("Verification failed for %{files_number} files.",
+                    "Проверка не пройдена для %{files_number} файлов.", locale='ru')
+    add_translation("ClassifyCameraFiles: started with settings %{settings}",
+                    "ClassifyCameraFiles: запущен с настройками %{settings}", locale='ru')
+    add_translation("%{max_minutes} minutes gap, %{min_files_count} files minimum: %{folders_len} folders and "
+                    "%{files_number} 'nothing common' files.",
+                    "%{max_minutes} минут промежуток, минимум %{min_files_count} файлов: %{folders_len} папок и "
+                    "%{files_number} 'ничего общего' файлов.", locale='ru')
+    add_translation("Similar", "Похожие", locale='ru')
+    add_translation("Progress", "Прогресс", locale='ru')
+    add_translation("Extracting %{files_number} files from '%{file_path}'...",
+                    "Извлекаю %{files_number} файлов из '%{file_path}'...", locale='ru')
+    add_translation("Can't move files out of archive '%{file_path}', copy them instead.",
+                    "Нельзя перенести файлы из архива '%{file_path}', скопируйте их.", locale='ru')
+    add_translation("Wrong IO limits '%{value}': %{e}", "Неверные ограничения ввода-вывода '%{value}': %{e}",
+                    locale='ru')
+    add_translation("%{prospective_dir} is not a valid path",
+                    "%{prospective_dir} неправильный путь", locale='ru')
+    add_translation("%{prospective_dir} is not a readable path",
+                    "%{prospective_dir} недоступный путь", locale='ru')
 
 
 class ClassifyCameraFiles():
     SUPPORTED_EXTENSIONS_PER_TYPE = {
-        "Image": ['.jpg', '.jpeg', '.tiff'],
+        "Image": ['.jpg', '.jpeg', '.tiff', '.tif', '.heic'],
+        "Raw": ['.cr2', '.nef', '.arw', '.dng'],
         "Video": ['.mov', '.mp4', '.avi', '.3gp'],
     }
+    # Sidecars are joined with media files having the same name in the same folder. Value is type to parse sidecar
+    # as if it carries own metadata (THM is a small JPEG with EXIF of video/RAW) or None if it doesn't.
+    SIDECAR_EXTENSIONS = {
+        '.thm': "Image",
+        '.xmp': None,
+        '.aae': None,
+    }
+    COMPANIONS_SEPARATOR = '|'
+    # Supported as media files but no parser backend can read their metadata, other files in group are preferred.
+    UNPARSABLE_METADATA_EXTENSIONS = ['.heic']
     SUPPORTED_FILE_ATTRIBUTES = [
         "FileCTime",  # File creation time.
         "FileMTime"  # File modification time.
@@ -43,6 +163,17 @@ class ClassifyCameraFiles():
     ]
     DEFAULT_TARGET_FOLDER = 'classified_files'
     DEFAULT_RESULTS_FILE = "classify_camera_files_analyze_results.csv"
+    MANIFEST_FILE = "classify_camera_files_manifest.csv"
+    COPY_CHUNK_SIZE = 1024 * 1024
+    # Metadata of archive members is parsed from their beginning, it is enough for EXIF of JPEG and TIFF-based RAW.
+    ARCHIVE_HEAD_SIZE = 1024 * 1024
+    VERIFY_WORKERS_COUNT = 4
+    PARSER_BACKENDS = ['pil', 'mmap']
+    SIMILAR_MAX_DISTANCE = 6  # In bits of 64-bit perceptual hash.
+    PLACE_MAX_DISTANCE_KM = 100  # To label folder with the nearest known place.
+    SERVICE_HOST = '127.0.0.1'  # Service is for local clients only.
+    METADATA_CACHE_SIZE = 100000  # In files, the least recently parsed ones are evicted.
+    DEFAULT_SERVICE_PORT = 8765
     MIN_FOLDER_FILES_COUNT = 3
     MAX_TIME_BETWEEN_FILES_IN_FOLDER_MINUTES = 60
 
@@ -61,80 +192,38 @@ class ClassifyCameraFiles():
             'max_minutes_between_files_in_folder', self.MAX_TIME_BETWEEN_FILES_IN_FOLDER_MINUTES)
         self.settings['lang'] = settings.get('lang', 'en')
         self.settings['verbose'] = settings.get('verbose', True)
+        self.settings['sweep_max_minutes_between_files_in_folder'] = settings.get(
+            'sweep_max_minutes_between_files_in_folder')
+        self.settings['sweep_min_folder_files_count'] = settings.get('sweep_min_folder_files_count')
+        self.settings['max_km_between_files_in_folder'] = settings.get('max_km_between_files_in_folder')
+        self.settings['is_detect_similar'] = settings.get('is_detect_similar', False)
+        self.settings['similar_max_distance'] = settings.get('similar_max_distance', self.SIMILAR_MAX_DISTANCE)
+        self.settings['parser_backend'] = settings.get('parser_backend', self.PARSER_BACKENDS[0])
+        self.settings['service_port'] = settings.get('service_port', self.DEFAULT_SERVICE_PORT)
+        # Parsed by 'transfer_scheduler.parse_limits'.
+        self.settings['io_limits'] = settings.get('io_limits')
+        self.settings['is_low_io_priority'] = settings.get('is_low_io_priority', False)
+        self.settings['is_verify'] = settings.get('is_verify', False)
+        self.settings['verify_workers_count'] = settings.get('verify_workers_count', self.VERIFY_WORKERS_COUNT)
         self.progress_listeners = [TqdmProgressListener()]
 
         # Each file in folder with extracted features.
         self.analyze_results: List[Dict] = None
+        # Analyze results sorted by time and index to classify them with any parameters. Built once per results.
+        self.timestamped_results: List[Dict] = None
+        self.classification_index: ClassificationIndex = None
+        # Index of file -> index of the latest near-duplicate before it. Found only if similar files are detected.
+        self.similar_earlier_files: Dict[int, int] = None
+        self.places_grid: locations.PlacesGrid = None
+        # Throttles copy/move/verify IO if limits are set.
+        self.transfer_scheduler: transfer_scheduler.TransferScheduler = None
         # List of folders to create with "from" -> "to" pathes. Values - list of tuples (src_path, src_name, ).
         self.classified_files: Dict[AnyStr, List] = None
-
-        # Setup localization. Note that Russian case is played via "few".
-        add_translation("No resutls to analyze, make sure that they are loaded.",
-                        'Нет результатов анализа, проверьте что они загружены.', locale='ru')
-        add_translation('Landscape', {
-                        'one': 'Ландшафтная', 'few': 'Ландшафтная', 'many': 'Ландшафтной'}, locale='ru')
-        add_translation('Portrait', {
-                        'one': 'Портретная', 'few': 'Портретная', 'many': 'Портретной'}, locale='ru')
-        add_translation(
-            'Dark', {'one': 'Тёмный', 'few': 'Тёмных', 'many': 'Тёмные'}, locale='ru')
-        add_translation(
-            'Light', {'one': 'Светлый', 'few': 'Светлых', 'many': 'Светлые'}, locale='ru')
-        add_translation('Unknown orientation',
-                        'Неизвестная ориентация', locale='ru')
-        add_translation("Looking through '%{source_folder}'...",
-                        "Анализирую '%{source_folder}'...", locale='ru')
-        add_translation("Analyzed %{files_number} files from '%{source_folder}' in %{duration}.",
-                        "Анализировано %{files_number} файлов в '%{source_folder}' за %{duration}.", locale='ru')
-        add_translation(
-            "Found %{files_number} files docs with %{keys} fields in '%{file_path}'.",
-            "Найдено %{files_number} описаний файлов с %{keys} полями в '%{file_path}'.",
-            locale='ru'
-        )
-        add_translation(
-            "Found nothing in '%{file_path}'.", "Ничего не найдено в %{file_path}.", locale='ru')
-        add_translation(
-            "Dumped %{files_number} files analyze results with %{possible_keys} columns into '%{file_path}'.",
-            "Сохранено %{files_number} результатов анализа файлов с %{possible_keys} полями в '%{file_path}'",
-            locale='ru'
-        )
-        add_translation("all %{label}", "все %{label}", locale='ru')
-        add_translation("mixed %{label1} and %{label2}",
-                        "смешаны %{label1} и %{label2}", locale='ru')
-        add_translation("mostly %{label}", "больше %{label}", locale='ru')
-        add_translation("Wrong DateTimeOriginal value in %{file_path} file: %{e}",
-                        "Неверное значение DateTimeOriginal в %{file_path} файле: %{e}", locale='ru')
-        add_translation(" files on ", " файлов в ", locale='ru')
-        add_translation(
-            "Skipping %{skipped_from_buckets_files} files as 'nothing common' in %{last_bucket_timestamp}"
-            "...%{start_bucket_timestamp}",
-            "Пропускаю %{skipped_from_buckets_files} файлов как 'ничего общего' в %{last_bucket_timestamp}"
-            "...%{start_bucket_timestamp}",
-            locale='ru'
-        )
-        add_translation("    Camera: %{camera_model_counter}",
-                        "    Камера: %{camera_model_counter}", locale='ru')
-        add_translation("    Brightness: %{brightness_counter}",
-                        "    Яркость: %{brightness_counter}", locale='ru')
-        add_translation("    Orientation: %{orientation_counter}",
-                        "    Ориентация: %{orientation_counter}", locale='ru')
-        add_translation("Total %{folders_len} folders and %{files_number} 'nothing common' files.",
-                        "Итого %{folders_len} папок и %{files_number} 'ничего общего' файлов.", locale='ru')
-        add_translation("Copying %{files_number} files into %{folder_name}...",
-                        "Копирую %{files_number} файлов в %{folder_name}...", locale='ru')
-        add_translation("Moving %{files_number} files into %{folder_name}...",
-                        "Переношу %{files_number} файлов в %{folder_name}...", locale='ru')
-        add_translation(
-            "Created %{folders_number} folders and copied %{files_number} files into '%{folder}' in %{duration}.",
-            "Создано %{folders_number} папок и скопировано %{files_number} файлов в '%{folder}' за %{duration}.",
-            locale='ru'
-        )
-        add_translation(
-            "Created %{folders_number} folders and moved %{files_number} files into '%{folder}' in %{duration}.",
-            "Создано %{folders_number} папок и перенесено %{files_number} файлов в '%{folder}' за %{duration}.",
-            locale='ru'
-        )
-        add_translation("ClassifyCameraFiles: started with settings %{settings}",
-                        "ClassifyCameraFiles: запущен с настройками %{settings}", locale='ru')
+        # Parsed metadata per (file path, parsers) with size and modification time of file to don't parse files again
+        # in long-running processes like service. The least recently used first.
+        self.metadata_cache: Dict[tuple, tuple] = collections.OrderedDict()
+        # Opened archive if source folder is an archive, only during analyze.
+        self.archive: archive_source.ArchiveReader = None
 
     def _step_all_progress_listeners(self, step: float):
         for progress_listener in self.progress_listeners:
@@ -150,45 +239,210 @@ class ClassifyCameraFiles():
                 progress_listener.finish()
             
 
+    def _get_file_stat(self, file_path: str) -> tuple:
+        if self.archive:
+            member = self.archive.members_by_path[file_path]
+            return member.size, member.mtime
+        stat = os.stat(file_path)
+        return stat.st_size, stat.st_mtime_ns
+
+    def _open_file(self, file_path: str) -> BinaryIO:
+        return self.archive.open(file_path) if self.archive else open(file_path, 'rb')
+
+    def _get_metadata_source(self, file_path: str) -> Union[str, bytes]:
+        # Files are mapped into memory by 'mmap_metadata' parsers, archive members are read from the beginning.
+        return self.archive.read_head(file_path, self.ARCHIVE_HEAD_SIZE) if self.archive else file_path
+
     def _parse_file_metadata(self, file_path: str) -> Dict:
+        if self.archive:  # Archives keep only modification time.
+            mtime = self.archive.members_by_path[file_path].mtime
+            return {"FileCTime": mtime, "FileMTime": mtime}
         return {  # Sync with SUPPORTED_FILE_ATTRIBUTES.
             "FileCTime": datetime.datetime.fromtimestamp(os.path.getctime(file_path)).replace(microsecond=0),
             "FileMTime": datetime.datetime.fromtimestamp(os.path.getmtime(file_path)).replace(microsecond=0),
         }
 
-    # TODO try faster? https://pypi.org/project/ExifRead/
-    def _parse_exif_tags(self, file_path: str) -> Dict:
+    def _filter_exif_tags(self, exif: Dict) -> Dict:
+        from PIL import ExifTags
         parsed_tags = {}
-        for k, v in dict(Image.open(file_path).getexif()).items():
+        for k, v in exif.items():
             if k in ExifTags.TAGS:
                 string_tag_name = ExifTags.TAGS[k]
                 if string_tag_name in self.SUPPORTED_EXIF_TAGS:
                     parsed_tags[string_tag_name] = repr(v)
+        # Decode position into numbers to don't parse GPSInfo on classify.
+        coordinates = locations.parse_gps_info(exif.get(mmap_metadata.GPS_IFD_TAG))
+        if coordinates:
+            parsed_tags["Latitude"] = f"{coordinates[0]:.6f}"
+            parsed_tags["Longitude"] = f"{coordinates[1]:.6f}"
         return parsed_tags
 
+    def _parse_exif_tags(self, file_path: str) -> Dict:
+        from PIL import Image
+        try:
+            # PIL reads only header from file object, archive member isn't decompressed in full.
+            with self._open_file(file_path) as file, Image.open(file) as image:
+                image_exif = image.getexif()
+                exif = dict(image_exif)
+                # Like 'mmap' backend put EXIF IFD tags on top level and GPS IFD as nested dictionary.
+                exif.update(image_exif.get_ifd(mmap_metadata.EXIF_IFD_TAG))
+                if mmap_metadata.GPS_IFD_TAG in exif:
+                    exif[mmap_metadata.GPS_IFD_TAG] = image_exif.get_ifd(mmap_metadata.GPS_IFD_TAG)
+        except OSError as e:  # Formats unknown to PIL, like HEIC.
+            self.logger.warn(t("Can't read EXIF from %{file_path} file: %{e}", file_path=file_path, e=e))
+            return {}
+        return self._filter_exif_tags(exif)
+
+    def _parse_exif_tags_mmap(self, file_path: str) -> Dict:
+        try:
+            exif = mmap_metadata.parse_exif_tags(self._get_metadata_source(file_path))
+        except (OSError, ValueError, struct.error) as e:  # Unreadable, broken or without TIFF structure, like HEIC.
+            self.logger.warn(t("Can't read EXIF from %{file_path} file: %{e}", file_path=file_path, e=e))
+            return {}
+        return self._filter_exif_tags(exif)
+
+    def _parse_perceptual_hash(self, file_path: str) -> Dict:
+        import io
+        from PIL import Image
+        try:
+            # Prefer EXIF thumbnail, otherwise decode JPEG in reduced size. Never decode full image - it is too slow.
+            thumbnail = mmap_metadata.parse_exif_thumbnail(self._get_metadata_source(file_path))
+            with self._open_file(file_path) as file, Image.open(io.BytesIO(thumbnail) if thumbnail else file) as image:
+                if image.draft('L', (similar_images.HASH_WIDTH * 8, similar_images.HASH_HEIGHT * 8)) is None \
+                        and not thumbnail:
+                    return {}
+                perceptual_hash = similar_images.perceptual_hash(image)
+        except (OSError, ValueError, struct.error) as e:
+            self.logger.warn(t("Can't compute perceptual hash of %{file_path} file: %{e}", file_path=file_path, e=e))
+            return {}
+        return {"PerceptualHash": f"{perceptual_hash:016x}"}
+
+    def _parse_movie_metadata(self, file_path: str) -> Dict:
+        try:
+            creation_time = mmap_metadata.parse_movie_creation_time(self._get_metadata_source(file_path))
+        except (OSError, ValueError, struct.error) as e:  # Unreadable or broken files.
+            self.logger.warn(t("Can't read creation time from %{file_path} video: %{e}", file_path=file_path, e=e))
+            return {}
+        if not creation_time:
+            return {}
+        # Keep the same format as EXIF tag to classify videos by it.
+        return {"DateTimeOriginal": repr(creation_time.strftime("%Y:%m:%d %H:%M:%S"))}
+
+    def _get_file_type(self, file_ext: str) -> str:
+        for type, extensions in self.SUPPORTED_EXTENSIONS_PER_TYPE.items():
+            if file_ext in extensions:
+                return type
+        return None
+
+    def _group_files(self, files: Iterable[str]) -> List[List[str]]:
+        """
+        Joins files from one folder into groups by name without extension, like "IMG_01.JPG", "IMG_01.CR2" and
+        "IMG_01.CR2.xmp". Groups without photo or video are skipped.
+        :param files: File names from one folder.
+        :return: List of groups, each group is a list of file names with main file first.
+        """
+        groups: Dict[str, List[str]] = collections.OrderedDict()
+        for file in files:
+            stem, file_ext = os.path.splitext(file)
+            file_ext = file_ext.lower()
+            if file_ext in self.SIDECAR_EXTENSIONS:
+                inner_stem, inner_ext = os.path.splitext(stem)
+                if self._get_file_type(inner_ext.lower()):
+                    stem = inner_stem
+            elif not self._get_file_type(file_ext):
+                continue
+            groups.setdefault(stem.lower(), []).append(file)
+        types_order = list(self.SUPPORTED_EXTENSIONS_PER_TYPE.keys())
+        result = []
+        for members in groups.values():
+            media = [x for x in members if self._get_file_type(os.path.splitext(x)[1].lower())]
+            if not media:
+                continue
+            media.sort(key=lambda x: types_order.index(self._get_file_type(os.path.splitext(x)[1].lower())))
+            result.append(media + [x for x in members if x not in media])
+        return result
+
+    def _choose_metadata_source(self, root: str, members: List[str]) -> (str, str):
+        """
+        Chooses the cheapest to parse file in group, i.e. the smallest one which has own metadata readable by parsers.
+        :param root: Folder of group.
+        :param members: File names in group.
+        :return: Tuple with path to file and type to parse it as.
+        """
+        candidates = []
+        for file in members:
+            file_ext = os.path.splitext(file)[1].lower()
+            type = self.SIDECAR_EXTENSIONS[file_ext] if file_ext in self.SIDECAR_EXTENSIONS \
+                else self._get_file_type(file_ext)
+            if type:
+                file_path = os.path.join(root, file)
+                candidates.append((file_ext in self.UNPARSABLE_METADATA_EXTENSIONS, self._get_file_stat(file_path)[0],
+                                   file_path, type))
+        _, _, file_path, type = min(candidates)
+        return file_path, type
+
+    def _parse_with_cache(self, file_path: str, parsers: List[Callable]) -> Dict:
+        key = (file_path, tuple(x.__name__ for x in parsers))
+        stat = self._get_file_stat(file_path)
+        cached = self.metadata_cache.get(key)
+        if cached is not None and cached[0] == stat:
+            self.metadata_cache.move_to_end(key)
+            return dict(cached[1])
+        features = {}
+        for parser in parsers:
+            features.update(parser(file_path))
+        # Entry of changed file is replaced.
+        self.metadata_cache[key] = (stat, features)
+        self.metadata_cache.move_to_end(key)
+        if len(self.metadata_cache) > self.METADATA_CACHE_SIZE:
+            self.metadata_cache.popitem(last=False)
+        return dict(features)
+
+    def _analyze_task(self, groups: List[tuple], progress_step: Callable[[float], None]):
+        for root, members, metadata_source, type_parsers in groups:
+            # Parse metadata once per group - all files in group are shoot at the same time.
+            file_path = os.path.join(root, members[0])
+            file_features: Dict = {"Path": file_path}
+            file_features.update(self._parse_with_cache(metadata_source, type_parsers))
+            file_features["Companions"] = self.COMPANIONS_SEPARATOR.join(members[1:])
+            if self.settings.get('verbose'):
+                self.logger.info(f"  {file_path} -> {file_features}")
+            self.analyze_results.append(file_features)
+            progress_step(1)
+
     def _analyze(self, parsers: Dict[AnyStr, Callable]):
         self.analyze_results: List[Dict] = []
+        self.classification_index = None
         start_time = datetime.datetime.now()
         self.logger.info(t("Looking through '%{source_folder}'...", source_folder=self.settings['source_folder']))
-        for root, _, files in os.walk(os.path.abspath(self.settings['source_folder'])):
-            for file in files:
-                file_path = os.path.join(root, file)
-                file_ext: str = os.path.splitext(file_path)[1]
-                for type, extensions in self.SUPPORTED_EXTENSIONS_PER_TYPE.items():
+        source_folder = os.path.abspath(self.settings['source_folder'])
+        if archive_source.is_archive(source_folder):
+            self.archive = archive_source.ArchiveReader(source_folder)
+            folders = self.archive.walk()
+        else:
+            folders = ((root, files) for root, _, files in os.walk(source_folder))
+        try:
+            groups = []
+            for root, files in folders:
+                for members in self._group_files(files):
+                    metadata_source, type = self._choose_metadata_source(root, members)
                     type_parsers = parsers.get(type)
-                    if type_parsers and file_ext.lower() in extensions:
-                        file_features: Dict = {"Path": file_path}
-                        for parser in type_parsers:
-                            new_fields = parser(file_path)
-                            file_features.update(new_fields)
-                        if self.settings.get('verbose'):
-                            self.logger.info(f"  {file_path} -> {file_features}")
-                        self.analyze_results.append(file_features)
+                    if type_parsers:
+                        groups.append((root, members, metadata_source, type_parsers))
+            if self.archive:
+                # Read members in order of their data to go through archive once.
+                groups.sort(key=lambda x: self.archive.members_by_path[x[2]].offset)
+            self._run_with_progress(len(groups), partial(self._analyze_task, groups))
+        finally:
+            if self.archive:
+                self.archive.close()
+                self.archive = None
         self.logger.info(t("Analyzed %{files_number} files from '%{source_folder}' in %{duration}.",
                  files_number=len(self.analyze_results), source_folder=self.settings['source_folder'],
                  duration=(datetime.datetime.now() - start_time)))
 
     def _save_results(self):
+        import csv
         possible_keys: Set = set()
         for result in self.analyze_results:
             possible_keys.update(list(result.keys()))
@@ -204,9 +458,11 @@ class ClassifyCameraFiles():
         )
 
     def _read_results(self):
+        import csv
         with open(self.settings['results_file_path'], 'r', newline='') as csvfile:
             reader = csv.DictReader(csvfile)
             self.analyze_results = [x for x in reader]
+        self.classification_index = None
         if self.analyze_results:
             self.logger.info(t("Found %{files_number} files docs with %{keys} fields in '%{file_path}'.",
                      files_number=len(self.analyze_results), keys=self.analyze_results[0].keys(),
@@ -241,7 +497,100 @@ class ClassifyCameraFiles():
     def _truncate_and_filtrate_for_path(string: str, max_length: int):
         return string.replace('\\', '').replace('/', '').replace(':', '')[:max_length]
 
-    def _classify(self):
+    def _build_files_actions(self, results: List[Dict]) -> List:
+        # Companions (RAW, sidecars) go along with main file and get the same name prefix.
+        files_actions = []
+        for result in results:
+            files_actions.append((result['Path'], result['_name']))
+            companions = result.get('Companions')
+            if companions:
+                folder = os.path.dirname(result['Path'])
+                prefix = result['_name'][:-len(os.path.basename(result['Path']))]
+                for companion in companions.split(self.COMPANIONS_SEPARATOR):
+                    files_actions.append((os.path.join(folder, companion), prefix + companion))
+        return files_actions
+
+    def _label_result(self, result: Dict) -> tuple:
+        # Camera name.
+        # For camera model just concatenate 'Make' and 'Model' EXIF tag values (if exist).
+        brightness = None
+        orientation = None
+        make = result.get('Make', "").strip("'")
+        model = result.get('Model', "").strip("'")
+        camera_name = ""
+        if make:
+            camera_name = make
+            if model:
+                camera_name += "-" + model
+        elif model:
+            camera_name = model
+        if camera_name:
+            camera_name = self._truncate_and_filtrate_for_path(camera_name, 20)
+            result['_camera'] = camera_name
+
+        # 'SceneCaptureType' EXIF tag contains weird grouped but useful values:
+        # 1 = Landscape, 2 = Portrait, 3 = Night scene
+        scene_capture_type = result.get('SceneCaptureType', "")
+        if scene_capture_type == '1':
+            orientation = 'Landscape'
+        elif scene_capture_type == '2':
+            orientation = 'Portrait'
+        elif scene_capture_type == '3':
+            brightness = 'Dark'
+
+        # Brightness.
+        # Good metric of brightness is ISOSpeedRatings. 500 is a border (experimentally).
+        if not brightness:
+            iso_speed_ratings = result.get('ISOSpeedRatings', "")
+            if iso_speed_ratings:
+                brightness = 'Dark' if int(iso_speed_ratings) >= 500 else 'Light'
+
+        # If flash was used and was detected by camera sensor then it is also points on dark place.
+        # See https://www.awaresystems.be/imaging/tiff/tifftags/privateifd/exif/flash.html
+        if not brightness:
+            brightness = 'Dark' if result.get('Flash', "") in ['9', '15', '25', '31'] else 'Light'
+
+        # Orientation.
+        # Simplify orientation to horisontal and vertical.
+        if not orientation:
+            orientation = result.get('Orientation', "")
+            if orientation:
+                orientation = 'Landscape' if orientation in ['1', '3'] else 'Portrait'
+        if not orientation:
+            orientation = 'Unknown orientation'
+        else:
+            result['_orientation'] = orientation
+
+        # Build file name.
+        file_name = os.path.basename(result['Path'])
+        result['_name'] = f"{result['_timestamp']} {t(brightness, count=1)} {t(orientation, count=1)}"\
+                          f" {camera_name} {file_name}"
+        return camera_name, brightness, orientation
+
+    @staticmethod
+    def _get_coordinates(result: Dict) -> tuple:
+        if result.get('Latitude') and result.get('Longitude'):
+            return float(result['Latitude']), float(result['Longitude'])
+        # Results saved before Latitude/Longitude columns have only GPSInfo representation.
+        gps_info = result.get('GPSInfo')
+        if gps_info:
+            import ast
+            try:
+                return locations.parse_gps_info(ast.literal_eval(gps_info))
+            except (ValueError, SyntaxError):
+                pass
+        return None
+
+    def _get_place(self, start: int, end: int) -> str:
+        center = self.classification_index.get_center(start, end)
+        if not center:
+            return None
+        if self.places_grid is None:
+            import places
+            self.places_grid = locations.PlacesGrid(places.PLACES)
+        return self.places_grid.find_nearest(center[0], center[1], self.PLACE_MAX_DISTANCE_KM)
+
+    def _build_classification_index(self):
         if not self.analyze_results:  # Ensure that list of results is not empty.
             raise ValueError(t("No resutls to analyze, make sure that they are loaded."))
 
@@ -268,102 +617,58 @@ class ClassifyCameraFiles():
                 if timestamp_modified < timestamp:
                     timestamp = timestamp_modified
             result['_timestamp'] = timestamp
-        timestamped = sorted(self.analyze_results,
-                             key=lambda x: x['_timestamp'])
-
-        # 2: Pack results into buckets by timestamp.
-        timestamp_buckets: Dict[int, List] = {}
-        start_bucket_datetime = None
-        current_bucket_datetime = datetime.datetime.fromtimestamp(0)
-        in_folder_gap = datetime.timedelta(
-            minutes=self.settings['max_minutes_between_files_in_folder'])
-        for result in timestamped:
-            timestamp = result['_timestamp']
-            if timestamp - current_bucket_datetime > in_folder_gap:
-                start_bucket_datetime = timestamp
-                timestamp_buckets[start_bucket_datetime] = [result]
-                current_bucket_datetime = timestamp
-            else:
-                timestamp_buckets[start_bucket_datetime].append(result)
-                current_bucket_datetime = timestamp
+        self.timestamped_results = sorted(self.analyze_results, key=lambda x: x['_timestamp'])
+
+        # 2: Label each file once, buckets are built from these labels for any parameters.
+        labels = {'camera': [], 'brightness': [], 'orientation': []}
+        for result in self.timestamped_results:
+            camera_name, brightness, orientation = self._label_result(result)
+            labels['camera'].append(camera_name)
+            labels['brightness'].append(brightness)
+            labels['orientation'].append(orientation)
+        self.classification_index = ClassificationIndex([x['_timestamp'] for x in self.timestamped_results], labels,
+                                                        [self._get_coordinates(x) for x in self.timestamped_results])
+        self.similar_earlier_files = None
+
+    def _find_similar_earlier_files(self):
+        # Find near-duplicates (bursts) for each file among files before it.
+        hashes = [int(x['PerceptualHash'], 16) if x.get('PerceptualHash') else None for x in self.timestamped_results]
+        self.similar_earlier_files = similar_images.find_similar_earlier(hashes, self.settings['similar_max_distance'])
 
-        # 3: Analyze each bucket to find out sizes. Buckets with few files makes no sense.
+    def _get_in_folder_gap(self, max_minutes_between_files_in_folder: int = None) -> datetime.timedelta:
+        if max_minutes_between_files_in_folder is None:
+            max_minutes_between_files_in_folder = self.settings['max_minutes_between_files_in_folder']
+        return datetime.timedelta(minutes=max_minutes_between_files_in_folder)
+
+    def _classify(self):
+        if self.classification_index is None:
+            self._build_classification_index()
+        index = self.classification_index
+        if self.settings['is_detect_similar'] and self.similar_earlier_files is None:
+            self._find_similar_earlier_files()
+
+        # Pack results into buckets by timestamp and analyze each bucket to find out sizes.
+        # Buckets with few files makes no sense.
         self.classified_files = {}
         out_of_bucket_files = []
         last_bucket_timestamp = None
         last_out_of_bucket_size = 0
-        for start_bucket_timestamp, results in timestamp_buckets.items():
-            camera_model_counter = collections.Counter()
-            brightness_counter = collections.Counter()
-            orientation_counter = collections.Counter()
-            for result in results:
-                brightness = None
-                orientation = None
-
-                # Camera name.
-                # For camera model just concatenate 'Make' and 'Model' EXIF tag values (if exist).
-                make = result.get('Make', "").strip("'")
-                model = result.get('Model', "").strip("'")
-                camera_name = ""
-                if make:
-                    camera_name = make
-                    if model:
-                        camera_name += "-" + model
-                elif model:
-                    camera_name = model
-                if camera_name:
-                    camera_name = self._truncate_and_filtrate_for_path(camera_name, 20)
-                    result['_camera'] = camera_name
-                camera_model_counter[camera_name] += 1
-
-                # 'SceneCaptureType' EXIF tag contains weird grouped but useful values:
-                # 1 = Landscape, 2 = Portrait, 3 = Night scene
-                scene_capture_type = result.get('SceneCaptureType', "")
-                if scene_capture_type == '1':
-                    orientation = 'Landscape'
-                elif scene_capture_type == '2':
-                    orientation == 'Portrait'
-                elif scene_capture_type == '3':
-                    brightness = 'Dark'
-
-                # Brightness.
-                # Good metric of brightness is ISOSpeedRatings. 500 is a border (experimentally).
-                if not brightness:
-                    iso_speed_ratings = result.get('ISOSpeedRatings', "")
-                    if iso_speed_ratings:
-                        brightness = 'Dark' if int(iso_speed_ratings) >= 500 else 'Light'
-
-                # If flash was used and was detected by camera sensor then it is also points on dark place.
-                # See https://www.awaresystems.be/imaging/tiff/tifftags/privateifd/exif/flash.html
-                if not brightness:
-                    brightness = 'Dark' if result.get('Flash', "") in ['9', '15', '25', '31'] else 'Light'
-                brightness_counter[brightness] += 1
-
-                # Orientation.
-                # Simplify orientation to horisontal and vertical.
-                if not orientation:
-                    orientation = result.get('Orientation', "")
-                    if orientation:
-                        orientation = 'Landscape' if orientation in ['1', '3'] else 'Portrait'
-                if not orientation:
-                    orientation = 'Unknown orientation'
-                else:
-                    result['_orientation'] = orientation
-                orientation_counter[orientation] += 1
-
-                # Build file name.
-                file_name = os.path.basename(result['Path'])
-                result['_name'] = f"{result['_timestamp']} {t(brightness, count=1)} {t(orientation, count=1)}"\
-                                  f" {camera_name} {file_name}"
+        buckets = index.get_buckets(self._get_in_folder_gap(), self.settings['max_km_between_files_in_folder'])
+        for start, end in buckets:
+            results = self.timestamped_results[start:end]
 
             # Skip too small buckets.
-            if len(results) < self.MIN_FOLDER_FILES_COUNT:
+            if len(results) < self.settings['min_folder_files_count']:
 
                 # Too little files to join them into separate folder. Leave them in 'nothing common' bucket.
                 out_of_bucket_files.extend(results)
                 continue
+            camera_model_counter = index.count_labels('camera', start, end)
+            brightness_counter = index.count_labels('brightness', start, end)
+            orientation_counter = index.count_labels('orientation', start, end)
 
             # Build folder name.
+            start_bucket_timestamp = results[0]['_timestamp']
             bucket_name = f"{start_bucket_timestamp} {len(results):3}{t(' files on ')}"\
                           f"{results[-1]['_timestamp'] - start_bucket_timestamp}"
             brightness_label = self._choose_right_label_from_counter(
@@ -374,10 +679,21 @@ class ClassifyCameraFiles():
                 orientation_counter, ('Portrait', 'Landscape'), "")
             if orientation_label:
                 bucket_name += f" {orientation_label}"
+            place = self._get_place(start, end)
+            if place:
+                bucket_name += f" {self._truncate_and_filtrate_for_path(place, 30)}"
 
-            # Build (from -> to) per file in folder.
-            self.classified_files[bucket_name] = [
-                (x['Path'], x['_name']) for x in results]
+            # Build (from -> to) per file in folder. Near-duplicates of earlier files in bucket go to subfolder.
+            main_results = []
+            similar_results = []
+            for i, result in enumerate(results, start):
+                is_similar = self.settings['is_detect_similar'] \
+                    and self.similar_earlier_files.get(i, -1) >= start
+                (similar_results if is_similar else main_results).append(result)
+            self.classified_files[bucket_name] = self._build_files_actions(main_results)
+            if similar_results:
+                self.classified_files[os.path.join(bucket_name, t("Similar"))] = \
+                    self._build_files_actions(similar_results)
 
             # Print bucket details if need.
             if self.settings.get('verbose'):
@@ -401,12 +717,26 @@ class ClassifyCameraFiles():
             last_bucket_timestamp = results[-1]['_timestamp']
             last_out_of_bucket_size = len(out_of_bucket_files)
         folders_len = len(self.classified_files)
-        for result in out_of_bucket_files:
-            self.classified_files[None] = [
-                (x['Path'], x['_name']) for x in out_of_bucket_files]
+        if out_of_bucket_files:
+            self.classified_files[None] = self._build_files_actions(out_of_bucket_files)
         self.logger.info(t("Total %{folders_len} folders and %{files_number} 'nothing common' files.",
                            folders_len=folders_len, files_number=len(out_of_bucket_files)))
 
+    def _sweep(self):
+        if self.classification_index is None:
+            self._build_classification_index()
+        for max_minutes in (self.settings['sweep_max_minutes_between_files_in_folder']
+                            or [self.settings['max_minutes_between_files_in_folder']]):
+            for min_files_count in (self.settings['sweep_min_folder_files_count']
+                                    or [self.settings['min_folder_files_count']]):
+                folders_len, files_number = self.classification_index.summarize(
+                    self._get_in_folder_gap(max_minutes), min_files_count,
+                    self.settings['max_km_between_files_in_folder'])
+                self.logger.info(t("%{max_minutes} minutes gap, %{min_files_count} files minimum: %{folders_len} "
+                                   "folders and %{files_number} 'nothing common' files.",
+                                   max_minutes=max_minutes, min_files_count=min_files_count,
+                                   folders_len=folders_len, files_number=files_number))
+
     def _make_folder(self):
         folder = self.settings['target_folder']
         if self.settings['is_replace_target']:
@@ -417,58 +747,238 @@ class ClassifyCameraFiles():
             os.makedirs(folder)
 
     def _copy(self):
+        self._setup_transfer()
         self._make_folder()
         self._run_with_progress(sum(len(x) for x in self.classified_files.values()), self._copy_task)
-    
+
+    def _setup_transfer(self):
+        limits = self.settings['io_limits']
+        self.transfer_scheduler = transfer_scheduler.TransferScheduler(limits) if limits else None
+        if self.settings['is_low_io_priority'] and shutil.which('ionice'):
+            import subprocess
+            # Lowest priority of "best effort" class. "Idle" class may starve forever on busy storage.
+            subprocess.run(['ionice', '-c', '2', '-n', '7', '-p', str(os.getpid())], check=False)
+
+    def _throttle(self, device: int, bytes_count: int):
+        if self.transfer_scheduler:
+            self.transfer_scheduler.throttle(device, bytes_count)
+
+    def _copy_stream(self, src: BinaryIO, src_device: int, dst_path: str, checksum=None):
+        dst_device = os.stat(os.path.dirname(dst_path)).st_dev
+        with open(dst_path, 'wb') as dst:
+            while True:
+                chunk = src.read(self.COPY_CHUNK_SIZE)
+                if not chunk:
+                    break
+                self._throttle(src_device, len(chunk))
+                if checksum:
+                    checksum.update(chunk)
+                self._throttle(dst_device, len(chunk))
+                dst.write(chunk)
+            # Don't let camera files evict page cache of other processes.
+            if self.settings['is_low_io_priority'] and hasattr(os, 'posix_fadvise'):
+                dst.flush()
+                os.fdatasync(dst.fileno())
+                os.posix_fadvise(dst.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+
+    def _copy_file(self, src_path: str, dst_path: str, checksum=None):
+        if checksum is None and self.transfer_scheduler is None and not self.settings['is_low_io_priority']:
+            shutil.copy2(src_path, dst_path)  # May use faster OS-specific ways to copy.
+            return
+        with open(src_path, 'rb') as src:
+            self._copy_stream(src, os.fstat(src.fileno()).st_dev, dst_path, checksum)
+            if self.settings['is_low_io_priority'] and hasattr(os, 'posix_fadvise'):
+                os.posix_fadvise(src.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+        shutil.copystat(src_path, dst_path)
+
+    def _extract_file(self, archive: archive_source.ArchiveReader, src_path: str, dst_path: str, checksum=None):
+        with archive.open(src_path) as src:
+            self._copy_stream(src, archive.device, dst_path, checksum)
+        timestamp = archive.members_by_path[src_path].mtime.timestamp()
+        os.utime(dst_path, (timestamp, timestamp))
+
+    def _copy_with_checksum(self, copy_function: Callable, src_path: str, dst_path: str) -> str:
+        import hashlib
+        # Calculate checksum on the same read as copy uses to don't read source twice.
+        checksum = hashlib.sha256()
+        copy_function(src_path, dst_path, checksum)
+        return checksum.hexdigest()
+
+    def _calculate_checksum(self, file_path: str) -> str:
+        import hashlib
+        checksum = hashlib.sha256()
+        device = os.stat(file_path).st_dev
+        with open(file_path, 'rb') as file:
+            # Flush written data to the device and drop it from page cache to check what device really stores.
+            if hasattr(os, 'posix_fadvise'):
+                os.fsync(file.fileno())
+                os.posix_fadvise(file.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+            while True:
+                chunk = file.read(self.COPY_CHUNK_SIZE)
+                if not chunk:
+                    break
+                self._throttle(device, len(chunk))
+                checksum.update(chunk)
+        return checksum.hexdigest()
+
+    def _verify_file(self, file_path: str, size: int, checksum: str) -> bool:
+        if not os.path.isfile(file_path):
+            self.logger.error(t("File '%{file_path}' is absent.", file_path=file_path))
+            return False
+        if os.path.getsize(file_path) != size or self._calculate_checksum(file_path) != checksum:
+            self.logger.error(t("Checksum mismatch in '%{file_path}' file.", file_path=file_path))
+            return False
+        return True
+
+    def _save_manifest(self, manifest: Dict[str, tuple]):
+        import csv
+        # Keep records about files copied before into the same target folder.
+        manifest_path = os.path.join(self.settings['target_folder'], self.MANIFEST_FILE)
+        if os.path.exists(manifest_path):
+            manifest = dict(self._read_manifest(manifest_path), **manifest)
+        with open(manifest_path, 'w', newline='') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(["Path", "Size", "SHA256"])
+            for path, (size, checksum) in manifest.items():
+                writer.writerow([path, size, checksum])
+        self.logger.info(t("Saved manifest for %{files_number} files into '%{file_path}'.",
+                           files_number=len(manifest), file_path=manifest_path))
+
+    @staticmethod
+    def _read_manifest(manifest_path: str) -> Dict[str, tuple]:
+        import csv
+        with open(manifest_path, 'r', newline='') as csvfile:
+            return {x['Path']: (int(x['Size']), x['SHA256']) for x in csv.DictReader(csvfile)}
+
     def _copy_task(self, progress_step: Callable[[float], None]):
         created_folders = 0
         copied_files = 0
         start_date = datetime.datetime.now()
-        for folder_name, files_actions in self.classified_files.items():
-            folder_path = os.path.join(
-                self.settings['target_folder'], folder_name) if folder_name else self.settings['target_folder']
-            if not os.path.exists(folder_path):
-                os.mkdir(folder_path)
-            # Yes, folder may be not created but count expected results, not actions.
-            created_folders += 1
-            self.logger.info(t("Copying %{files_number} files into %{folder_name}...",
-                    files_number=len(files_actions), folder_name=(folder_name if folder_name else folder_path)))
-            for action in files_actions:
-                shutil.copy2(action[0], os.path.join(
-                    folder_path, action[1]))
-                copied_files += 1
+        if self.settings['is_verify']:
+            import concurrent.futures
+            # Verify copied files in parallel with copying next ones.
+            manifest: Dict[str, tuple] = {}
+            verifications = []
+            executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.settings['verify_workers_count'])
+
+        def copy_file(copy_function: Callable, src_path: str, target_path: str, size: int):
+            if self.settings['is_verify']:
+                checksum = self._copy_with_checksum(copy_function, src_path, target_path)
+                manifest[os.path.relpath(target_path, self.settings['target_folder'])] = (size, checksum)
+                verifications.append(executor.submit(self._verify_file, target_path, size, checksum))
+            else:
+                copy_function(src_path, target_path)
+            progress_step(1)
+
+        # Archive path -> member path -> target paths. Members are extracted after usual files in one pass over archive.
+        archives_actions: Dict[str, Dict[str, List[str]]] = {}
+        # Save manifest of already copied files even if copying failed or was cancelled, to verify them later.
+        try:
+            for folder_name, files_actions in self.classified_files.items():
+                folder_path = os.path.join(
+                    self.settings['target_folder'], folder_name) if folder_name else self.settings['target_folder']
+                os.makedirs(folder_path, exist_ok=True)
+                # Yes, folder may be not created but count expected results, not actions.
+                created_folders += 1
+                self.logger.info(t("Copying %{files_number} files into %{folder_name}...",
+                        files_number=len(files_actions), folder_name=(folder_name if folder_name else folder_path)))
+                for action in files_actions:
+                    target_path = os.path.join(folder_path, action[1])
+                    archive_path = archive_source.find_archive(action[0])
+                    if archive_path:
+                        archives_actions.setdefault(archive_path, {}).setdefault(action[0], []).append(target_path)
+                    else:
+                        copy_file(self._copy_file, action[0], target_path, os.path.getsize(action[0]))
+                    copied_files += 1
+            for archive_path, members_targets in archives_actions.items():
+                self.logger.info(t("Extracting %{files_number} files from '%{file_path}'...",
+                                   files_number=sum(len(x) for x in members_targets.values()), file_path=archive_path))
+                with archive_source.ArchiveReader(archive_path) as archive:
+                    extract_file = partial(self._extract_file, archive)
+                    for member in archive.members:
+                        member_path = archive.get_path(member)
+                        for target_path in members_targets.get(member_path, ()):
+                            copy_file(extract_file, member_path, target_path, member.size)
+            self.logger.info(t("Created %{folders_number} folders and copied %{files_number} files into '%{folder}' in %{duration}.",
+                     folders_number=created_folders, files_number=copied_files, folder=self.settings['target_folder'],
+                     duration=(datetime.datetime.now() - start_date)))
+        finally:
+            if self.settings['is_verify']:
+                executor.shutdown(wait=True)
+                self._save_manifest(manifest)
+        if self.settings['is_verify']:
+            failed_number = sum(1 for x in verifications if not x.result())
+            if failed_number:
+                raise ValueError(t("Verification failed for %{files_number} files.", files_number=failed_number))
+            self.logger.info(t("Verified %{files_number} files in %{duration}.", files_number=len(verifications),
+                               duration=(datetime.datetime.now() - start_date)))
+
+    def _verify_task(self, manifest: Dict[str, tuple], progress_step: Callable[[float], None]):
+        import concurrent.futures
+        start_date = datetime.datetime.now()
+        failed_number = 0
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.settings['verify_workers_count']) as executor:
+            verifications = [
+                executor.submit(self._verify_file, os.path.join(self.settings['target_folder'], path), size, checksum)
+                for path, (size, checksum) in manifest.items()
+            ]
+            for verification in concurrent.futures.as_completed(verifications):
+                if not verification.result():
+                    failed_number += 1
                 progress_step(1)
-        self.logger.info(t("Created %{folders_number} folders and copied %{files_number} files into '%{folder}' in %{duration}.",
-                 folders_number=created_folders, files_number=copied_files, folder=self.settings['target_folder'],
-                 duration=(datetime.datetime.now() - start_date)))
+        if failed_number:
+            raise ValueError(t("Verification failed for %{files_number} files.", files_number=failed_number))
+        self.logger.info(t("Verified %{files_number} files in %{duration}.", files_number=len(manifest),
+                           duration=(datetime.datetime.now() - start_date)))
 
     def _move(self):
+        for files_actions in self.classified_files.values():
+            for action in files_actions:
+                archive_path = archive_source.find_archive(action[0])
+                if archive_path:
+                    raise ValueError(t("Can't move files out of archive '%{file_path}', copy them instead.",
+                                       file_path=archive_path))
+        self._setup_transfer()
+        self._make_folder()
+        self._run_with_progress(sum(len(x) for x in self.classified_files.values()), self._move_task)
+
+    def _move_task(self, progress_step: Callable[[float], None]):
         created_folders = 0
         moved_files = 0
         start_date = datetime.datetime.now()
-        self._make_folder()
         for folder_name, files_actions in self.classified_files.items():
             folder_path = os.path.join(
                 self.settings['target_folder'], folder_name) if folder_name else self.settings['target_folder']
-            if not os.path.exists(folder_path):
-                os.mkdir(folder_path)
+            os.makedirs(folder_path, exist_ok=True)
             # Yes, folder may be not created but count expected results, not actions.
             created_folders += 1
             self.logger.info(t("Moving %{files_number} files into %{folder_name}...", files_number=len(files_actions),
                     folder_name=(folder_name if folder_name else folder_path)))
             for action in files_actions:
-                shutil.move(action[0], os.path.join(folder_path, action[1]))
+                # Files are renamed on the same device and copied via throttled copy otherwise.
+                shutil.move(action[0], os.path.join(folder_path, action[1]), copy_function=self._copy_file)
                 moved_files += 1
+                progress_step(1)
         self.logger.info(t("Created %{folders_number} folders and moved %{files_number} files into '%{folder}' in %{duration}.",
-                 folders_number=created_folders, folder=moved_files, target_folder=self.settings['target_folder'],
+                 folders_number=created_folders, files_number=moved_files, folder=self.settings['target_folder'],
                  duration=(datetime.datetime.now() - start_date)))
 
     def analyze_all(self):
         self.logger.info("------------------------------------")
         self.logger.info(t("ClassifyCameraFiles: started with settings %{settings}", settings=self.settings))
+        if self.settings['parser_backend'] == 'mmap':
+            exif_parser = self._parse_exif_tags_mmap
+            video_parsers = [self._parse_file_metadata, self._parse_movie_metadata]
+        else:
+            exif_parser = self._parse_exif_tags
+            video_parsers = [self._parse_file_metadata]  # TODO parse info from video.
+        image_parsers = [self._parse_file_metadata, exif_parser]
+        if self.settings['is_detect_similar']:
+            image_parsers.append(self._parse_perceptual_hash)
         self._analyze({
-            "Image": [self._parse_file_metadata, self._parse_exif_tags],
-            "Video": [self._parse_file_metadata]  # TODO parse info from video.
+            "Image": image_parsers,
+            "Raw": image_parsers,
+            "Video": video_parsers
         })
         self._save_results()
 
@@ -478,6 +988,12 @@ class ClassifyCameraFiles():
         self._read_results()
         self._classify()
 
+    def sweep_in_console(self):
+        self.logger.info("------------------------------------")
+        self.logger.info(t("ClassifyCameraFiles: started with settings %{settings}", settings=self.settings))
+        self._read_results()
+        self._sweep()
+
     def move(self):
         self.logger.info("------------------------------------")
         self.logger.info(t("ClassifyCameraFiles: started with settings %{settings}", settings=self.settings))
@@ -492,6 +1008,20 @@ class ClassifyCameraFiles():
         self._classify()
         self._copy()
 
+    def verify(self):
+        self.logger.info("------------------------------------")
+        self.logger.info(t("ClassifyCameraFiles: started with settings %{settings}", settings=self.settings))
+        manifest_path = os.path.join(self.settings['target_folder'], self.MANIFEST_FILE)
+        manifest = self._read_manifest(manifest_path)
+        self._setup_transfer()
+        self.logger.info(t("Verifying %{files_number} files from '%{file_path}'...",
+                           files_number=len(manifest), file_path=manifest_path))
+        self._run_with_progress(len(manifest), partial(self._verify_task, manifest))
+
+    def serve(self):
+        import classifier_service
+        classifier_service.ClassifierService(self).serve_forever(self.SERVICE_HOST, self.settings['service_port'])
+
     def analyze_all_and_copy(self):
         self.analyze_all()
         self._read_results()
@@ -521,10 +1051,9 @@ class ProgressListener:
 
 
 class TqdmProgressListener(ProgressListener):
-    def __init__(self) -> None:
-        add_translation("Progress", "Прогресс", locale='ru')
-
     def start(self, total: float):
+        import tqdm
+        from tqdm.contrib.logging import logging_redirect_tqdm
         self.tqdm = tqdm.tqdm(total=total, desc=t("Progress"), unit='files')
         self.tqdm_context_manager = logging_redirect_tqdm()
         self.tqdm_context_manager.__enter__()
@@ -539,7 +1068,7 @@ class TqdmProgressListener(ProgressListener):
 class ReadableDirAction(argparse.Action):
     def __call__(self, parser, namespace, values, option_string=None):
         prospective_dir = values
-        if not os.path.isdir(prospective_dir):
+        if not os.path.isdir(prospective_dir) and not archive_source.is_archive(prospective_dir):
             raise argparse.ArgumentTypeError(
                 t("%{prospective_dir} is not a valid path", prospective_dir=prospective_dir))
         if os.access(prospective_dir, os.R_OK):
@@ -549,6 +1078,13 @@ class ReadableDirAction(argparse.Action):
                 t("%{prospective_dir} is not a readable path", prospective_dir=prospective_dir))
 
 
+def parse_io_limits(value: str) -> list:
+    try:
+        return transfer_scheduler.parse_limits(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(t("Wrong IO limits '%{value}': %{e}", value=value, e=e))
+
+
 def setup_logging():
     logging.addLevelName(logging.WARNING, 'WARN')
     logging.basicConfig(level=logging.INFO, format='%(levelname)-5s: %(message)s') 
@@ -556,10 +1092,6 @@ def setup_logging():
 
 
 if __name__ == "__main__":
-    add_translation("%{prospective_dir} is not a valid path",
-                    "%{prospective_dir} неправильный путь", locale='ru')
-    add_translation("%{prospective_dir} is not a readable path",
-                    "%{prospective_dir} недоступный путь", locale='ru')
     if len(sys.argv) == 1:  # If no arguments - run UI.
         import classifier_ui
         lang = setup_localization()
@@ -588,13 +1120,26 @@ if __name__ == "__main__":
                 'desc': 'Read CSV with anylize result, classify and print results.',
                 'method_to_run': "classify_in_console",
             },
+            'sweep': {
+                'desc': 'Read CSV with anylize result, print folders number for each pair of sweep parameters.',
+                'method_to_run': "sweep_in_console",
+            },
+            'serve': {
+                'desc': 'Run local HTTP/JSON service to queue analyze/classify/copy/move jobs.',
+                'method_to_run': "serve",
+            },
+            'verify': {
+                'desc': 'Read manifest in target folder and verify checksums of files.',
+                'method_to_run': "verify",
+            },
         }
         parser = argparse.ArgumentParser(
             description='Traverse specified folder recursively, classifies files from camera (photos and videos), '
                         'moves them to new folders with names based on classses. Uses EXIF tags and creation time.'
         )
         parser.add_argument('-s', '--source-folder', dest='source_folder', action=ReadableDirAction, required=False,
-                            help='Path to folder with not classified files. Will be traversed recursively.')
+                            help='Path to folder or ZIP/TAR archive with not classified files. Will be traversed '
+                                 'recursively. Files in archive are analyzed and copied without extracting it.')
         parser.add_argument('-t', '--target-folder', dest='target_folder', type=str,
                             default=ClassifyCameraFiles.DEFAULT_TARGET_FOLDER,
                             help='Path to folder move/copy files into. '
@@ -613,10 +1158,46 @@ if __name__ == "__main__":
         parser.add_argument('--max-minutes-between-files-in-folder', dest='max_minutes_between_files_in_folder',
                             type=int, default=ClassifyCameraFiles.MAX_TIME_BETWEEN_FILES_IN_FOLDER_MINUTES,
                             help='Maximum time gap in minutes between filed to put them in one folder.')
+        parser.add_argument('--sweep-max-minutes-between-files-in-folder',
+                            dest='sweep_max_minutes_between_files_in_folder', type=int, nargs='+',
+                            help='Values of "--max-minutes-between-files-in-folder" to try with "sweep" action.')
+        parser.add_argument('--sweep-min-folder-files-count', dest='sweep_min_folder_files_count', type=int,
+                            nargs='+', help='Values of "--min-folder-files-count" to try with "sweep" action.')
+        parser.add_argument('--max-km-between-files-in-folder', dest='max_km_between_files_in_folder', type=float,
+                            help='Maximum distance in km between geotagged files to put them in one folder. '
+                                 'By default files are not split by place.')
+        parser.add_argument('--detect-similar', dest='is_detect_similar', action='store_true',
+                            help='Flag to calculate perceptual hashes of images on analyze and put near-duplicates '
+                                 '(bursts) into "Similar" subfolder of folder on classify.')
+        parser.add_argument('--similar-max-distance', dest='similar_max_distance', type=int,
+                            default=ClassifyCameraFiles.SIMILAR_MAX_DISTANCE,
+                            help='Max number of different bits in 64-bit perceptual hashes of similar images.')
+        parser.add_argument('--parser-backend', dest='parser_backend', choices=ClassifyCameraFiles.PARSER_BACKENDS,
+                            default=ClassifyCameraFiles.PARSER_BACKENDS[0],
+                            help='How to parse metadata. "mmap" maps files into memory and reads only pages with '
+                                 'metadata - fast for big TIFF/RAW files, also parses creation time of MP4/MOV videos.')
+        parser.add_argument('--io-limits', dest='io_limits', type=parse_io_limits,
+                            help='Limits of bytes/s and IO operations/s per device for copy/move/verify. Either for '
+                                 'the whole day like "50M/200" or per time range like "08:00-20:00=20M/100,'
+                                 '20:00-08:00=0" (0 means no limit).')
+        parser.add_argument('--low-io-priority', dest='is_low_io_priority', action='store_true',
+                            help='Flag to copy/move with low IO priority (ionice) and drop copied files from page '
+                                 'cache to don\'t slow down other processes on shared storage.')
+        parser.add_argument('--verify', dest='is_verify', action='store_true',
+                            help='Flag to calculate checksums during copying, verify copied files and save manifest '
+                                 f'"{ClassifyCameraFiles.MANIFEST_FILE}" into target folder.')
+        parser.add_argument('--verify-workers-count', dest='verify_workers_count', type=int,
+                            default=ClassifyCameraFiles.VERIFY_WORKERS_COUNT,
+                            help='Number of threads to verify files with.')
+        parser.add_argument('--port', dest='service_port', type=int, default=ClassifyCameraFiles.DEFAULT_SERVICE_PORT,
+                            help='Port for "serve" action to listen on localhost.')
         parser.add_argument('--language', dest='lang', type=str, default=locale.getdefaultlocale()[0][0:2],
                             help='Specify language for output. By default is used system locale.')
         logger = setup_logging()
+        # Setup localization before parsing other arguments to translate their errors.
+        language_parser = argparse.ArgumentParser(add_help=False)
+        language_parser.add_argument('--language', dest='lang', type=str, default=locale.getdefaultlocale()[0][0:2])
+        setup_localization(language_parser.parse_known_args()[0].lang)
         args = parser.parse_args()
-        setup_localization(args.lang)
         worker = ClassifyCameraFiles(logger, vars(args))
         getattr(worker, ACTIONS[args.action]['method_to_run'])()
@@ -1,5 +1,29 @@
-import i18n  # gettext is too complex for setup with extra files.
 import locale
+import threading
+from typing import Callable, List
+
+# 'i18n' (gettext is too complex for setup with extra files) is imported on first use to keep startup fast.
+_translations_loaders: List[Callable] = []
+_translations_loaders_lock = threading.Lock()
+
+
+def register_translations(loader: Callable):
+    """
+    Registers function which adds translations via 'add_translation'. Functions are called once per process, right
+    before the first translation, so processes which don't translate anything don't pay for it.
+    Can be used as decorator.
+    :param loader: Function without arguments to add translations.
+    :return: The same function.
+    """
+    with _translations_loaders_lock:
+        _translations_loaders.append(loader)
+    return loader
+
+
+def _load_translations():
+    with _translations_loaders_lock:
+        while _translations_loaders:
+            _translations_loaders.pop(0)()
 
 
 def t(key, **kwargs):
@@ -12,6 +36,8 @@ def t(key, **kwargs):
     :param kwargs: Extra parameters for translation.
     :return Localized value.
     """
+    import i18n
+    _load_translations()
     locale = kwargs.pop('locale', i18n.config.get('locale'))
     if i18n.translations.has(key, locale):
         return i18n.translator.translate(key, locale=locale, **kwargs)
@@ -31,6 +57,7 @@ def setup_localization(lang: str = locale.getdefaultlocale()[0][0:2]):
     :param lang: Locale is simplified to language. Specify it.
     :return: Specified language.
     """
+    import i18n
     i18n.set('locale', lang)  # Simplify locale to language.
     i18n.set('fallback', 'en')
     return lang
@@ -40,4 +67,5 @@ def add_translation(key: str, value, locale: str):
     """
     See i18n.add_translation function.
     """
+    import i18n
     i18n.add_translation(key, value, locale)
@@ -0,0 +1,94 @@
+import math
+from typing import Dict, List, Optional, Tuple
+
+# GPS coordinates decoding, distances and offline lookup of nearest known place via grid spatial index.
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+# GPS IFD tags, see https://www.awaresystems.be/imaging/tiff/tifftags/privateifd/gps.html
+GPS_LATITUDE_REF_TAG = 1
+GPS_LATITUDE_TAG = 2
+GPS_LONGITUDE_REF_TAG = 3
+GPS_LONGITUDE_TAG = 4
+
+
+def _parse_degrees(value, ref: str, negative_ref: str) -> float:
+    # Value is (degrees, minutes, seconds) or already degrees.
+    if isinstance(value, (tuple, list)):
+        degrees = sum(float(x) / 60 ** i for i, x in enumerate(value))
+    else:
+        degrees = float(value)
+    if isinstance(ref, bytes):
+        ref = ref.decode('ascii', 'replace')
+    return -degrees if str(ref).strip('\0 ').upper() == negative_ref else degrees
+
+
+def parse_gps_info(gps_info: Dict) -> Optional[Tuple[float, float]]:
+    """
+    Decodes GPSInfo EXIF tag.
+    :param gps_info: GPS IFD as dictionary with tag IDs as keys.
+    :return: Tuple (latitude, longitude) in degrees or None if there is no valid position.
+    """
+    if not isinstance(gps_info, dict) or GPS_LATITUDE_TAG not in gps_info or GPS_LONGITUDE_TAG not in gps_info:
+        return None
+    try:
+        latitude = _parse_degrees(gps_info[GPS_LATITUDE_TAG], gps_info.get(GPS_LATITUDE_REF_TAG, 'N'), 'S')
+        longitude = _parse_degrees(gps_info[GPS_LONGITUDE_TAG], gps_info.get(GPS_LONGITUDE_REF_TAG, 'E'), 'W')
+    except (TypeError, ValueError, ZeroDivisionError):
+        return None
+    if math.isnan(latitude) or math.isnan(longitude) or abs(latitude) > 90 or abs(longitude) > 180:
+        return None
+    # (0, 0) is written by some phones when there is no GPS fix.
+    if latitude == 0 and longitude == 0:
+        return None
+    return latitude, longitude
+
+
+def distance_km(latitude1: float, longitude1: float, latitude2: float, longitude2: float) -> float:
+    """
+    :return: Great-circle distance by haversine formula.
+    """
+    phi1, phi2 = math.radians(latitude1), math.radians(latitude2)
+    delta_phi = phi2 - phi1
+    delta_lambda = math.radians(longitude2 - longitude1)
+    a = math.sin(delta_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class PlacesGrid():
+    """
+    Places bucketed into cells of fixed size in degrees, so nearest place search checks only cells around point.
+    """
+    CELL_DEGREES = 2
+
+    def __init__(self, places: List[tuple]) -> None:
+        """
+        :param places: List of (name, latitude, longitude).
+        """
+        self.cells: Dict[Tuple[int, int], List[tuple]] = {}
+        self.lon_cells_count = 360 // self.CELL_DEGREES
+        for place in places:
+            self.cells.setdefault(self._get_cell(place[1], place[2]), []).append(place)
+
+    def _get_cell(self, latitude: float, longitude: float) -> Tuple[int, int]:
+        return (math.floor(latitude / self.CELL_DEGREES),
+                math.floor(longitude / self.CELL_DEGREES) % self.lon_cells_count)
+
+    def find_nearest(self, latitude: float, longitude: float, max_distance_km: float) -> Optional[str]:
+        """
+        :return: Name of nearest place not further than 'max_distance_km' or None.
+        """
+        lat_cell, lon_cell = self._get_cell(latitude, longitude)
+        lat_cells_radius = math.ceil(max_distance_km / KM_PER_DEGREE / self.CELL_DEGREES)
+        # Degree of longitude becomes shorter to poles.
+        cos_latitude = max(math.cos(math.radians(min(abs(latitude) + max_distance_km / KM_PER_DEGREE, 90))), 0.01)
+        lon_cells_radius = min(math.ceil(max_distance_km / KM_PER_DEGREE / cos_latitude / self.CELL_DEGREES),
+                               self.lon_cells_count // 2)
+        nearest_name, nearest_distance = None, max_distance_km
+        for i in range(lat_cell - lat_cells_radius, lat_cell + lat_cells_radius + 1):
+            for j in range(lon_cell - lon_cells_radius, lon_cell + lon_cells_radius + 1):
+                for name, place_latitude, place_longitude in self.cells.get((i, j % self.lon_cells_count), ()):
+                    distance = distance_km(latitude, longitude, place_latitude, place_longitude)
+                    if distance <= nearest_distance:
+                        nearest_name, nearest_distance = name, distance
+        return nearest_name
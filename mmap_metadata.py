@@ -0,0 +1,202 @@
+import datetime
+import mmap
+import struct
+from typing import Any, Dict, Optional, Tuple, Union
+
+# Metadata parsers which map file into memory and jump by offsets stored in file (TIFF IFD offsets, MP4 box sizes)
+# instead of reading it sequentially. Only touched pages are read from disk, so cost doesn't depend on file size.
+# Parsers also accept already read beginning of file, like head of archive member.
+
+EXIF_IFD_TAG = 0x8769
+GPS_IFD_TAG = 0x8825
+THUMBNAIL_OFFSET_TAG = 0x0201  # JPEGInterchangeFormat
+THUMBNAIL_LENGTH_TAG = 0x0202  # JPEGInterchangeFormatLength
+# TIFF field type -> (struct format, size of one value).
+TIFF_TYPES = {
+    1: ('B', 1),  # BYTE
+    2: ('s', 1),  # ASCII
+    3: ('H', 2),  # SHORT
+    4: ('L', 4),  # LONG
+    5: ('LL', 8),  # RATIONAL
+    6: ('b', 1),  # SBYTE
+    7: ('s', 1),  # UNDEFINED
+    8: ('h', 2),  # SSHORT
+    9: ('l', 4),  # SLONG
+    10: ('ll', 8),  # SRATIONAL
+    11: ('f', 4),  # FLOAT
+    12: ('d', 8),  # DOUBLE
+}
+MP4_EPOCH_OFFSET = 2082844800  # Seconds between 1904-01-01 (MP4 epoch) and 1970-01-01.
+MP4_CONTAINER_BOXES = (b'moov',)
+
+
+def _open_mmap(file_path: str) -> Optional[mmap.mmap]:
+    with open(file_path, 'rb') as file:
+        file.seek(0, 2)
+        if file.tell() == 0:  # Empty file can't be mapped.
+            return None
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _open_buffer(source: Union[str, bytes]):
+    if isinstance(source, str):
+        return _open_mmap(source)
+    return memoryview(source) if source else None
+
+
+def _read_tiff_value(view: memoryview, endian: str, entry_offset: int, base: int) -> Any:
+    field_type, count = struct.unpack_from(endian + 'HL', view, entry_offset + 2)
+    if field_type not in TIFF_TYPES:
+        return None
+    value_format, value_size = TIFF_TYPES[field_type]
+    size = value_size * count
+    # Values which don't fit into 4 bytes are stored by offset from TIFF header.
+    value_offset = entry_offset + 8
+    if size > 4:
+        value_offset = base + struct.unpack_from(endian + 'L', view, entry_offset + 8)[0]
+    if value_offset + size > len(view):
+        raise ValueError(f"TIFF value at {value_offset} is out of file")
+    if value_format == 's':
+        raw = bytes(view[value_offset:value_offset + size])
+        return raw.split(b'\0', 1)[0].decode('utf-8', 'replace').strip() if field_type == 2 else raw
+    values = struct.unpack_from(endian + value_format * count, view, value_offset)
+    if len(value_format) == 2:  # Rational values go by pairs.
+        values = tuple(x / y if y else float('nan') for x, y in zip(values[::2], values[1::2]))
+    return values[0] if len(values) == 1 else values
+
+
+def _read_ifd(view: memoryview, endian: str, base: int, ifd_offset: int) -> Dict[int, Any]:
+    entries_count = struct.unpack_from(endian + 'H', view, base + ifd_offset)[0]
+    tags = {}
+    for i in range(entries_count):
+        entry_offset = base + ifd_offset + 2 + i * 12
+        tag = struct.unpack_from(endian + 'H', view, entry_offset)[0]
+        tags[tag] = _read_tiff_value(view, endian, entry_offset, base)
+    return tags
+
+
+def _read_tiff_header(view: memoryview, base: int) -> Tuple[str, int]:
+    byte_order = bytes(view[base:base + 2])
+    if byte_order == b'II':
+        endian = '<'
+    elif byte_order == b'MM':
+        endian = '>'
+    else:
+        raise ValueError("Not a TIFF header")
+    return endian, struct.unpack_from(endian + 'L', view, base + 4)[0]
+
+
+def _read_tiff(view: memoryview, base: int) -> Dict[int, Any]:
+    endian, ifd_offset = _read_tiff_header(view, base)
+    tags = _read_ifd(view, endian, base, ifd_offset)
+    # EXIF and GPS tags are stored in own IFDs referenced from the first one.
+    if isinstance(tags.get(EXIF_IFD_TAG), int):
+        tags.update(_read_ifd(view, endian, base, tags.pop(EXIF_IFD_TAG)))
+    if isinstance(tags.get(GPS_IFD_TAG), int):
+        tags[GPS_IFD_TAG] = _read_ifd(view, endian, base, tags[GPS_IFD_TAG])
+    return tags
+
+
+def _find_jpeg_exif(view: memoryview) -> Optional[int]:
+    # Go through JPEG segments up to image data to find APP1 segment with EXIF.
+    offset = 2
+    while offset + 4 <= len(view):
+        marker, length = struct.unpack_from('>BH', view, offset + 1)
+        if view[offset] != 0xFF or marker == 0xDA:  # Broken file or start of image data.
+            return None
+        if marker == 0xE1 and bytes(view[offset + 4:offset + 10]) == b'Exif\0\0':
+            return offset + 10
+        offset += 2 + length
+    return None
+
+
+def _find_tiff_base(view: memoryview) -> Optional[int]:
+    if bytes(view[0:2]) == b'\xff\xd8':
+        return _find_jpeg_exif(view)
+    return 0
+
+
+def parse_exif_tags(source: Union[str, bytes]) -> Dict[int, Any]:
+    """
+    Parses EXIF tags from JPEG (including THM sidecars), TIFF and TIFF-based RAW files (CR2, NEF, ARW, DNG).
+    :param source: Path to file or bytes with its beginning.
+    :return: Dictionary with tag IDs as keys like in 'PIL.ExifTags.TAGS', GPS IFD is a nested dictionary.
+    Empty dictionary if file has no EXIF.
+    :raises ValueError, struct.error: If file is broken.
+    """
+    mm = _open_buffer(source)
+    if mm is None:
+        return {}
+    with mm:
+        view = memoryview(mm)
+        try:
+            base = _find_tiff_base(view)
+            return _read_tiff(view, base) if base is not None else {}
+        finally:
+            view.release()
+
+
+def parse_exif_thumbnail(source: Union[str, bytes]) -> Optional[bytes]:
+    """
+    Extracts JPEG thumbnail (usually 160x120) which cameras put into the second IFD of EXIF.
+    :param source: Path to file or bytes with its beginning.
+    :return: Bytes of JPEG thumbnail or None if file doesn't have it.
+    :raises ValueError, struct.error: If file is broken.
+    """
+    mm = _open_buffer(source)
+    if mm is None:
+        return None
+    with mm:
+        view = memoryview(mm)
+        try:
+            base = _find_tiff_base(view)
+            if base is None:
+                return None
+            endian, ifd_offset = _read_tiff_header(view, base)
+            entries_count = struct.unpack_from(endian + 'H', view, base + ifd_offset)[0]
+            next_ifd_offset = struct.unpack_from(endian + 'L', view, base + ifd_offset + 2 + entries_count * 12)[0]
+            if not next_ifd_offset:
+                return None
+            tags = _read_ifd(view, endian, base, next_ifd_offset)
+            offset, length = tags.get(THUMBNAIL_OFFSET_TAG), tags.get(THUMBNAIL_LENGTH_TAG)
+            if not isinstance(offset, int) or not isinstance(length, int) or base + offset + length > len(view):
+                return None
+            return bytes(view[base + offset:base + offset + length])
+        finally:
+            view.release()
+
+
+def parse_movie_creation_time(source: Union[str, bytes]) -> Optional[datetime.datetime]:
+    """
+    Parses creation time from 'moov/mvhd' box of MP4, MOV and 3GP files. Boxes are skipped by their sizes, so 'moov'
+    box is found without reading media data even if it is placed at the end of file.
+    :param source: Path to file or bytes with its beginning.
+    :return: Local creation time or None if file doesn't have it.
+    :raises ValueError, struct.error: If file is broken.
+    """
+    mm = _open_buffer(source)
+    if mm is None:
+        return None
+    with mm:
+        offset, end = 0, len(mm)
+        while offset + 8 <= end:
+            size, box_type = struct.unpack_from('>L4s', mm, offset)
+            header_size = 8
+            if size == 1:  # 64-bit size follows box type.
+                size = struct.unpack_from('>Q', mm, offset + 8)[0]
+                header_size = 16
+            elif size == 0:  # Box lasts up to the end of file.
+                size = end - offset
+            if size < header_size:
+                raise ValueError(f"Wrong box size {size} at {offset}")
+            if box_type in MP4_CONTAINER_BOXES:
+                offset, end = offset + header_size, offset + size
+                continue
+            if box_type == b'mvhd':
+                version = mm[offset + header_size]
+                creation_time = struct.unpack_from('>Q' if version == 1 else '>L', mm, offset + header_size + 4)[0]
+                if creation_time <= MP4_EPOCH_OFFSET:  # Not set or set wrong.
+                    return None
+                return datetime.datetime.fromtimestamp(creation_time - MP4_EPOCH_OFFSET)
+            offset += size
+    return None
@@ -0,0 +1,206 @@
+# Offline table of places to label folders with coarse location: (name, latitude, longitude).
+# Python module instead of data file to be packed by PyInstaller without extra options.
+PLACES = [
+    # Russia and neighbours.
+    ("Moscow", 55.756, 37.617),
+    ("Saint Petersburg", 59.939, 30.316),
+    ("Novosibirsk", 55.030, 82.920),
+    ("Yekaterinburg", 56.838, 60.597),
+    ("Kazan", 55.796, 49.106),
+    ("Nizhny Novgorod", 56.327, 44.006),
+    ("Samara", 53.195, 50.100),
+    ("Rostov-on-Don", 47.222, 39.720),
+    ("Krasnodar", 45.035, 38.975),
+    ("Sochi", 43.585, 39.723),
+    ("Sevastopol", 44.617, 33.525),
+    ("Volgograd", 48.708, 44.513),
+    ("Voronezh", 51.672, 39.184),
+    ("Perm", 58.010, 56.229),
+    ("Ufa", 54.735, 55.959),
+    ("Omsk", 54.989, 73.368),
+    ("Krasnoyarsk", 56.010, 92.852),
+    ("Irkutsk", 52.287, 104.305),
+    ("Vladivostok", 43.116, 131.886),
+    ("Khabarovsk", 48.480, 135.072),
+    ("Murmansk", 68.970, 33.075),
+    ("Arkhangelsk", 64.540, 40.543),
+    ("Kaliningrad", 54.710, 20.511),
+    ("Yaroslavl", 57.627, 39.894),
+    ("Tver", 56.859, 35.912),
+    ("Minsk", 53.902, 27.562),
+    ("Kyiv", 50.450, 30.524),
+    ("Odesa", 46.482, 30.723),
+    ("Lviv", 49.840, 24.030),
+    ("Kharkiv", 49.993, 36.231),
+    ("Riga", 56.950, 24.105),
+    ("Tallinn", 59.437, 24.754),
+    ("Vilnius", 54.687, 25.280),
+    ("Tbilisi", 41.716, 44.783),
+    ("Yerevan", 40.179, 44.499),
+    ("Baku", 40.409, 49.867),
+    ("Almaty", 43.238, 76.946),
+    ("Astana", 51.169, 71.449),
+    ("Tashkent", 41.299, 69.240),
+    ("Bishkek", 42.875, 74.570),
+    ("Chisinau", 47.011, 28.864),
+    # Europe.
+    ("London", 51.507, -0.128),
+    ("Edinburgh", 55.953, -3.188),
+    ("Dublin", 53.350, -6.260),
+    ("Paris", 48.857, 2.352),
+    ("Lyon", 45.764, 4.836),
+    ("Marseille", 43.296, 5.370),
+    ("Nice", 43.710, 7.262),
+    ("Brussels", 50.850, 4.352),
+    ("Amsterdam", 52.370, 4.895),
+    ("Berlin", 52.520, 13.405),
+    ("Hamburg", 53.551, 9.994),
+    ("Munich", 48.135, 11.582),
+    ("Frankfurt", 50.110, 8.682),
+    ("Cologne", 50.938, 6.960),
+    ("Vienna", 48.208, 16.374),
+    ("Zurich", 47.377, 8.542),
+    ("Geneva", 46.204, 6.143),
+    ("Prague", 50.076, 14.438),
+    ("Warsaw", 52.230, 21.012),
+    ("Krakow", 50.065, 19.945),
+    ("Budapest", 47.498, 19.040),
+    ("Bratislava", 48.149, 17.107),
+    ("Ljubljana", 46.057, 14.506),
+    ("Zagreb", 45.815, 15.982),
+    ("Split", 43.508, 16.440),
+    ("Dubrovnik", 42.650, 18.094),
+    ("Belgrade", 44.787, 20.457),
+    ("Podgorica", 42.441, 19.263),
+    ("Sarajevo", 43.856, 18.413),
+    ("Skopje", 41.998, 21.425),
+    ("Tirana", 41.327, 19.819),
+    ("Sofia", 42.698, 23.322),
+    ("Varna", 43.214, 27.914),
+    ("Bucharest", 44.427, 26.103),
+    ("Athens", 37.984, 23.728),
+    ("Thessaloniki", 40.640, 22.944),
+    ("Heraklion", 35.339, 25.144),
+    ("Rome", 41.903, 12.496),
+    ("Milan", 45.464, 9.190),
+    ("Venice", 45.441, 12.316),
+    ("Florence", 43.770, 11.256),
+    ("Naples", 40.852, 14.268),
+    ("Palermo", 38.116, 13.361),
+    ("Madrid", 40.417, -3.704),
+    ("Barcelona", 41.385, 2.173),
+    ("Valencia", 39.470, -0.376),
+    ("Seville", 37.389, -5.984),
+    ("Malaga", 36.721, -4.421),
+    ("Palma", 39.570, 2.650),
+    ("Las Palmas", 28.124, -15.430),
+    ("Santa Cruz de Tenerife", 28.464, -16.252),
+    ("Lisbon", 38.722, -9.139),
+    ("Porto", 41.158, -8.629),
+    ("Copenhagen", 55.676, 12.568),
+    ("Stockholm", 59.329, 18.069),
+    ("Oslo", 59.914, 10.752),
+    ("Bergen", 60.391, 5.322),
+    ("Helsinki", 60.170, 24.938),
+    ("Reykjavik", 64.147, -21.942),
+    ("Valletta", 35.899, 14.514),
+    ("Nicosia", 35.186, 33.382),
+    ("Istanbul", 41.008, 28.978),
+    ("Ankara", 39.934, 32.860),
+    ("Antalya", 36.897, 30.713),
+    ("Izmir", 38.424, 27.143),
+    # Middle East and Africa.
+    ("Tel Aviv", 32.085, 34.782),
+    ("Jerusalem", 31.768, 35.214),
+    ("Amman", 31.954, 35.911),
+    ("Beirut", 33.894, 35.502),
+    ("Dubai", 25.205, 55.271),
+    ("Abu Dhabi", 24.454, 54.377),
+    ("Doha", 25.285, 51.531),
+    ("Riyadh", 24.713, 46.675),
+    ("Tehran", 35.689, 51.389),
+    ("Cairo", 30.044, 31.236),
+    ("Hurghada", 27.258, 33.812),
+    ("Sharm El Sheikh", 27.916, 34.330),
+    ("Tunis", 36.806, 10.181),
+    ("Marrakesh", 31.629, -7.981),
+    ("Casablanca", 33.573, -7.590),
+    ("Nairobi", -1.292, 36.822),
+    ("Zanzibar", -6.165, 39.202),
+    ("Cape Town", -33.925, 18.424),
+    ("Johannesburg", -26.204, 28.047),
+    ("Lagos", 6.524, 3.379),
+    ("Victoria (Seychelles)", -4.619, 55.452),
+    ("Port Louis", -20.161, 57.501),
+    # Asia and Oceania.
+    ("Delhi", 28.614, 77.209),
+    ("Mumbai", 19.076, 72.878),
+    ("Goa", 15.300, 74.124),
+    ("Bangalore", 12.972, 77.595),
+    ("Kathmandu", 27.717, 85.324),
+    ("Colombo", 6.927, 79.861),
+    ("Male", 4.175, 73.509),
+    ("Bangkok", 13.756, 100.502),
+    ("Phuket", 7.880, 98.392),
+    ("Chiang Mai", 18.788, 98.985),
+    ("Hanoi", 21.028, 105.854),
+    ("Ho Chi Minh City", 10.823, 106.630),
+    ("Nha Trang", 12.239, 109.197),
+    ("Phnom Penh", 11.556, 104.928),
+    ("Kuala Lumpur", 3.139, 101.687),
+    ("Singapore", 1.352, 103.820),
+    ("Jakarta", -6.208, 106.846),
+    ("Denpasar", -8.650, 115.217),
+    ("Manila", 14.600, 120.984),
+    ("Hong Kong", 22.320, 114.169),
+    ("Beijing", 39.904, 116.407),
+    ("Shanghai", 31.230, 121.474),
+    ("Guangzhou", 23.129, 113.264),
+    ("Sanya", 18.253, 109.512),
+    ("Taipei", 25.033, 121.565),
+    ("Seoul", 37.567, 126.978),
+    ("Tokyo", 35.676, 139.650),
+    ("Osaka", 34.694, 135.502),
+    ("Kyoto", 35.012, 135.768),
+    ("Sapporo", 43.062, 141.354),
+    ("Ulaanbaatar", 47.886, 106.906),
+    ("Sydney", -33.869, 151.209),
+    ("Melbourne", -37.814, 144.963),
+    ("Brisbane", -27.470, 153.026),
+    ("Perth", -31.950, 115.861),
+    ("Auckland", -36.849, 174.763),
+    ("Wellington", -41.287, 174.776),
+    # Americas.
+    ("New York", 40.713, -74.006),
+    ("Boston", 42.360, -71.059),
+    ("Washington", 38.907, -77.037),
+    ("Chicago", 41.878, -87.630),
+    ("Miami", 25.762, -80.192),
+    ("Orlando", 28.538, -81.379),
+    ("Atlanta", 33.749, -84.388),
+    ("Houston", 29.760, -95.370),
+    ("Dallas", 32.777, -96.797),
+    ("Denver", 39.739, -104.990),
+    ("Las Vegas", 36.170, -115.140),
+    ("Los Angeles", 34.052, -118.244),
+    ("San Francisco", 37.775, -122.419),
+    ("Seattle", 47.606, -122.332),
+    ("Honolulu", 21.307, -157.858),
+    ("Anchorage", 61.218, -149.900),
+    ("Toronto", 43.653, -79.383),
+    ("Montreal", 45.502, -73.567),
+    ("Vancouver", 49.283, -123.121),
+    ("Mexico City", 19.433, -99.133),
+    ("Cancun", 21.162, -86.851),
+    ("Havana", 23.113, -82.366),
+    ("Punta Cana", 18.582, -68.405),
+    ("Panama City", 8.983, -79.517),
+    ("Bogota", 4.711, -74.072),
+    ("Lima", -12.046, -77.043),
+    ("Cusco", -13.532, -71.967),
+    ("Quito", -0.180, -78.468),
+    ("Santiago", -33.449, -70.669),
+    ("Buenos Aires", -34.604, -58.382),
+    ("Rio de Janeiro", -22.907, -43.173),
+    ("Sao Paulo", -23.551, -46.633),
+]
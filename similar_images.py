@@ -0,0 +1,101 @@
+import itertools
+from typing import Any, Dict, List, Optional
+
+# Near-duplicate images search by 64-bit perceptual hashes (difference hash) indexed with multi-index hashing, so each
+# search compares hash only with few candidates instead of all hashes.
+
+HASH_WIDTH = 8
+HASH_HEIGHT = 8
+# 'int.bit_count' is available since Python 3.10.
+_bit_count = getattr(int, 'bit_count', None) or (lambda x: bin(x).count('1'))
+
+
+def perceptual_hash(image) -> int:
+    """
+    Calculates difference hash: each bit tells whether pixel is brighter than its right neighbour on image reduced
+    to 9x8 grayscale pixels. Similar images get hashes with small Hamming distance.
+    :param image: PIL image, better already reduced via 'draft' to don't decode it in full size.
+    :return: 64-bit hash.
+    """
+    from PIL import Image
+    pixels = list(image.convert('L').resize((HASH_WIDTH + 1, HASH_HEIGHT), Image.BILINEAR).getdata())
+    result = 0
+    for row in range(HASH_HEIGHT):
+        for column in range(HASH_WIDTH):
+            offset = row * (HASH_WIDTH + 1) + column
+            result = (result << 1) | (1 if pixels[offset] < pixels[offset + 1] else 0)
+    return result
+
+
+def hamming_distance(hash1: int, hash2: int) -> int:
+    return _bit_count(hash1 ^ hash2)
+
+
+class MultiIndexHashes():
+    """
+    Multi-index hashing: each hash is split into 4 chunks of 16 bits and each chunk is indexed in own dictionary.
+    By pigeonhole principle hashes not further than 'max_distance' = 4 * a + b have one of the first b + 1 chunks not
+    further than a or one of the rest chunks not further than a - 1 (Norouzi et al., "Fast Search in Hamming Space
+    with Multi-Index Hashing"), so search checks only hashes found by few chunk values close to chunks of requested
+    hash. Equal hashes (dark frames, plain sky, long bursts) are indexed once, so they don't slow down search.
+    """
+    CHUNKS_COUNT = 4
+    CHUNK_BITS = 16
+
+    def __init__(self, max_distance: int) -> None:
+        self.max_distance = max_distance
+        # XOR masks per chunk to get all chunk values within chunk distance.
+        a, b = divmod(max_distance, self.CHUNKS_COUNT)
+        self.chunk_masks = [
+            [
+                sum(1 << x for x in bits)
+                for distance in range(a + 1 if i <= b else a)
+                for bits in itertools.combinations(range(self.CHUNK_BITS), distance)
+            ]
+            for i in range(self.CHUNKS_COUNT)
+        ]
+        self.chunk_mask = (1 << self.CHUNK_BITS) - 1
+        # Chunk value -> distinct hashes with it.
+        self.tables: List[Dict[int, List[int]]] = [{} for _ in range(self.CHUNKS_COUNT)]
+        # Hash -> items with it in order of adding.
+        self.items: Dict[int, List[Any]] = {}
+
+    def add(self, value: int, item: Any):
+        items = self.items.get(value)
+        if items is None:
+            items = self.items[value] = []
+            for i, table in enumerate(self.tables):
+                table.setdefault((value >> (i * self.CHUNK_BITS)) & self.chunk_mask, []).append(value)
+        items.append(item)
+
+    def search(self, value: int) -> List[int]:
+        """
+        :return: Distinct hashes not further than 'max_distance' from 'value', see 'items' for their items.
+        """
+        candidates = []
+        for i, table in enumerate(self.tables):
+            chunk = (value >> (i * self.CHUNK_BITS)) & self.chunk_mask
+            # Look up and check candidates via 'map' to don't run Python code per candidate - it is the hottest loop.
+            candidates.extend(itertools.chain.from_iterable(
+                map(table.get, map(chunk.__xor__, self.chunk_masks[i]), itertools.repeat(()))))
+        distances = map(_bit_count, map(value.__xor__, candidates))
+        # The same hash may be found by few chunks.
+        return list(set(itertools.compress(candidates, map(self.max_distance.__ge__, distances))))
+
+def find_similar_earlier(hashes: List[Optional[int]], max_distance: int) -> Dict[int, int]:
+    """
+    Finds the latest near-duplicate for each image among images before it.
+    :param hashes: Perceptual hashes of images in some order, None for images without hash.
+    :param max_distance: Max Hamming distance between hashes of similar images.
+    :return: Image index -> index of the latest similar image before it. Images without similar ones are absent.
+    """
+    index = MultiIndexHashes(max_distance)
+    result = {}
+    for i, value in enumerate(hashes):
+        if value is None:
+            continue
+        similar = index.search(value)
+        if similar:
+            result[i] = max(index.items[x][-1] for x in similar)
+        index.add(value, i)
+    return result
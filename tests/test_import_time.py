@@ -0,0 +1,43 @@
+import os
+import subprocess
+import sys
+import unittest
+
+REPO_FOLDER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Modules which are imported on first use only, see "Heavy modules" comment in classify_camera_files.py.
+LAZY_MODULES = ['PIL', 'tqdm', 'i18n', 'csv', 'hashlib', 'zipfile', 'tarfile']
+# Generous for slow machines - import takes ~50 ms now and ~180 ms with heavy modules imported on startup.
+MAX_IMPORT_MICROSECONDS = 150000
+RUNS_COUNT = 3
+
+
+def _import_with_importtime():
+    """
+    :return: Dictionary of imported module name -> cumulative import time in microseconds.
+    """
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import classify_camera_files'],
+                             cwd=REPO_FOLDER, stderr=subprocess.PIPE, universal_newlines=True, check=True)
+    modules = {}
+    for line in process.stderr.splitlines():
+        # Like "import time:       755 |      15406 |   archive_source".
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = int(cumulative)
+    return modules
+
+
+class ImportTimeTest(unittest.TestCase):
+    def test_heavy_modules_are_not_imported(self):
+        modules = _import_with_importtime()
+        for module in LAZY_MODULES:
+            self.assertNotIn(module, modules, f"'{module}' should be imported on first use.")
+
+    def test_import_time_budget(self):
+        # The first run may compile sources, take the best run.
+        import_time = min(_import_with_importtime()['classify_camera_files'] for _ in range(RUNS_COUNT))
+        self.assertLess(import_time, MAX_IMPORT_MICROSECONDS)
+
+
+if __name__ == '__main__':
+    unittest.main()
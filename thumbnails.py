@@ -0,0 +1,139 @@
+import collections
+import hashlib
+import os
+import struct
+import threading
+from typing import Callable, Iterable, Optional
+import mmap_metadata
+
+# Thumbnails for preview of classification: made from EXIF thumbnails or reduced JPEG decoding in background threads,
+# kept in size-bounded in-memory LRU and in on-disk cache to don't decode the same photos on next run.
+
+THUMBNAIL_SIZE = 128
+DEFAULT_CACHE_FOLDER = os.path.join(os.path.expanduser('~'), '.cache', 'classify_camera_files', 'thumbnails')
+DEFAULT_MAX_MEMORY_BYTES = 64 * 1024 * 1024
+DEFAULT_WORKERS_COUNT = 4
+
+
+def make_thumbnail(file_path: str, size: int = THUMBNAIL_SIZE):
+    """
+    Makes thumbnail without decoding image in full size: takes EXIF thumbnail if there is one, otherwise lets JPEG
+    decoder scale image down via 'draft'.
+    :param file_path: Path to image.
+    :param size: Max width and height of thumbnail.
+    :return: PIL image in RGB mode.
+    :raises OSError, ValueError, struct.error: If file is not an image or broken, or it is not JPEG and has no EXIF
+        thumbnail, so it could be decoded in full size only.
+    """
+    import io
+    from PIL import Image
+    thumbnail = mmap_metadata.parse_exif_thumbnail(file_path)
+    with Image.open(io.BytesIO(thumbnail) if thumbnail else file_path) as image:
+        if image.draft('RGB', (size, size)) is None and not thumbnail:
+            raise ValueError(f"Can't decode {file_path} in reduced size")
+        image.thumbnail((size, size))
+        return image.convert('RGB')
+
+
+class ThumbnailCache():
+    """
+    Thumbnails by file path. 'get' is fast and doesn't touch disk so it may be called from UI thread, missing
+    thumbnails are loaded by 'request' in background.
+    """
+
+    def __init__(self, cache_folder: str = DEFAULT_CACHE_FOLDER, max_memory_bytes: int = DEFAULT_MAX_MEMORY_BYTES,
+                 workers_count: int = DEFAULT_WORKERS_COUNT, size: int = THUMBNAIL_SIZE) -> None:
+        import concurrent.futures
+        self.cache_folder = cache_folder
+        self.max_memory_bytes = max_memory_bytes
+        self.size = size
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers_count)
+        self.lock = threading.Lock()
+        # File path -> PIL image (or None if file has no thumbnail), the least recently used first.
+        self.images: collections.OrderedDict = collections.OrderedDict()
+        self.memory_bytes = 0
+        self.pending = set()
+        # Only the latest requested paths are loaded, others are dropped when scrolled away before loading.
+        self.wanted = set()
+
+    def _get_cache_path(self, file_path: str) -> Optional[str]:
+        try:
+            stat = os.stat(file_path)
+        except OSError:  # Like files in archives.
+            return None
+        key = hashlib.sha1(f"{file_path}|{stat.st_size}|{stat.st_mtime_ns}|{self.size}".encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_folder, key[:2], key + '.jpg')
+
+    def _put(self, file_path: str, image):
+        with self.lock:
+            self.images[file_path] = image
+            self.images.move_to_end(file_path)
+            self.memory_bytes += image.width * image.height * 3 if image else 0
+            while self.memory_bytes > self.max_memory_bytes and len(self.images) > 1:
+                _, evicted = self.images.popitem(last=False)
+                self.memory_bytes -= evicted.width * evicted.height * 3 if evicted else 0
+
+    def _load(self, file_path: str):
+        from PIL import Image
+        cache_path = self._get_cache_path(file_path)
+        if cache_path is None:
+            return None
+        if os.path.isfile(cache_path):
+            try:
+                with Image.open(cache_path) as image:
+                    return image.convert('RGB')
+            except OSError:  # Broken cache file, make it again.
+                pass
+        try:
+            image = make_thumbnail(file_path, self.size)
+        except (OSError, ValueError, struct.error):  # Videos, broken images, formats unknown to PIL.
+            return None
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            image.save(cache_path, 'JPEG', quality=85)
+        except OSError:  # Cache is optional.
+            pass
+        return image
+
+    def _load_task(self, file_path: str, callback: Callable[[str], None]):
+        try:
+            with self.lock:
+                if file_path not in self.wanted:
+                    return
+            self._put(file_path, self._load(file_path))
+        finally:
+            with self.lock:
+                self.pending.discard(file_path)
+        callback(file_path)
+
+    def get(self, file_path: str):
+        """
+        :return: Tuple with flag whether thumbnail is loaded and PIL image (None if file has no thumbnail).
+        """
+        with self.lock:
+            if file_path not in self.images:
+                return False, None
+            self.images.move_to_end(file_path)
+            return True, self.images[file_path]
+
+    def request(self, file_paths: Iterable[str], callback: Callable[[str], None]):
+        """
+        Loads thumbnails in background, drops previous requests which are not loaded yet.
+        :param file_paths: Paths to files to load thumbnails for, in order of priority.
+        :param callback: Called from background thread with file path when thumbnail is loaded.
+        """
+        file_paths = list(file_paths)
+        with self.lock:
+            self.wanted = set(file_paths)
+            to_load = [x for x in file_paths if x not in self.images and x not in self.pending]
+            self.pending.update(to_load)
+        for file_path in to_load:
+            self.executor.submit(self._load_task, file_path, callback)
+
+    def close(self):
+        """
+        Drops requests which are not loaded yet and stops background threads once loading thumbnails are done.
+        """
+        with self.lock:
+            self.wanted = set()
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,115 @@
+import datetime
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+# Throttling of file transfers to keep shared storage responsive: bytes/s and IOPS are limited per device with token
+# buckets, limits may depend on time of day (e.g. fast at night, throttled by day).
+
+SIZE_SUFFIXES = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+MINUTES_IN_DAY = 24 * 60
+
+
+class TokenBucket():
+    """
+    Allows 'rate' units per second with bursts up to 1 second of rate. Request bigger than available tokens waits.
+    """
+
+    def __init__(self, rate: float) -> None:
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def consume(self, amount: float):
+        # Lock is kept during sleep on purpose - all threads share the same budget.
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate) - amount
+            self.updated = now
+            if self.tokens < 0:
+                time.sleep(-self.tokens / self.rate)
+                self.tokens = 0
+                self.updated = time.monotonic()
+
+
+def parse_size(value: str) -> int:
+    """
+    :param value: Number of bytes with optional K, M or G suffix, like "50M".
+    :return: Number of bytes.
+    """
+    value = value.strip().upper()
+    multiplier = SIZE_SUFFIXES.get(value[-1:], 1)
+    return int(float(value[:-1] if value[-1:] in SIZE_SUFFIXES else value) * multiplier)
+
+
+def _parse_minutes(value: str) -> int:
+    hours, _, minutes = value.strip().partition(':')
+    result = int(hours) * 60 + int(minutes)
+    if not 0 <= result <= MINUTES_IN_DAY:
+        raise ValueError(f"Wrong time '{value}'")
+    return result
+
+
+def parse_limits(value: str) -> List[Tuple[int, int, Optional[int], Optional[int]]]:
+    """
+    Parses limits profile like "08:00-20:00=20M/100,20:00-08:00=200M" or just "50M/200" for the whole day.
+    Each item is "[time range=]bytes per second[/IO operations per second]", "0" means no limit.
+    :return: List of (start minute, end minute, bytes per second, IOPS) tuples, None means no limit.
+    :raises ValueError: If value has wrong format.
+    """
+    result = []
+    for item in value.split(','):
+        time_range, _, limits = item.strip().rpartition('=')
+        start, end = 0, MINUTES_IN_DAY
+        if time_range:
+            start, separator, end = time_range.partition('-')
+            if not separator:
+                raise ValueError(f"Wrong time range '{time_range}', expected like '08:00-20:00'")
+            start, end = _parse_minutes(start), _parse_minutes(end)
+        bytes_rate, _, iops = limits.partition('/')
+        bytes_rate, iops = parse_size(bytes_rate), int(iops) if iops else 0
+        if bytes_rate < 0 or iops < 0:
+            raise ValueError(f"Negative limit in '{item}'")
+        result.append((start, end, bytes_rate or None, iops or None))
+    return result
+
+
+class TransferScheduler():
+    """
+    Throttles reads and writes per device. Call 'throttle' before each IO operation.
+    """
+
+    def __init__(self, limits: List[Tuple[int, int, Optional[int], Optional[int]]]) -> None:
+        self.limits = limits
+        self.buckets: Dict[tuple, TokenBucket] = {}
+        self.lock = threading.Lock()
+
+    def _get_current_limits(self) -> Tuple[Optional[int], Optional[int]]:
+        now = datetime.datetime.now()
+        minute = now.hour * 60 + now.minute
+        for start, end, bytes_rate, iops in self.limits:
+            # Range may go over midnight, like 20:00-08:00.
+            if (start <= minute < end) if start <= end else (minute >= start or minute < end):
+                return bytes_rate, iops
+        return None, None
+
+    def _get_bucket(self, key: tuple) -> TokenBucket:
+        with self.lock:
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                bucket = self.buckets[key] = TokenBucket(key[-1])
+            return bucket
+
+    def throttle(self, device: int, bytes_count: int):
+        """
+        Waits until device is allowed to do one more IO operation with given number of bytes.
+        :param device: Device ID, see 'os.stat_result.st_dev'.
+        :param bytes_count: Number of bytes to read or write.
+        """
+        bytes_rate, iops = self._get_current_limits()
+        # Rate is a part of key so buckets are switched with profile.
+        if iops:
+            self._get_bucket((device, 'iops', iops)).consume(1)
+        if bytes_rate and bytes_count:
+            self._get_bucket((device, 'bytes', bytes_rate)).consume(bytes_count)